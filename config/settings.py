@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 # ========================
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.profiling.ProfilingMiddleware",  # inactivo salvo PROFILING_SAMPLE_RATE > 0
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # debe ir antes de CommonMiddleware
     "django.middleware.common.CommonMiddleware",
@@ -125,7 +126,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.RolesJWTAuthentication",  # usa los claims de rol del token
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -156,6 +157,10 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # roles / estudiante_id como claims del access token (no del refresh): un cambio de grupos
+    # aplica en el siguiente refresh, a lo sumo ACCESS_TOKEN_LIFETIME después
+    "TOKEN_OBTAIN_SERIALIZER": "core.serializers.RolesTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.serializers.MeasuredTokenRefreshSerializer",
 }
 
 
@@ -163,3 +168,100 @@ SIMPLE_JWT = {
 # CORS (dev)
 # ========================
 CORS_ALLOW_ALL_ORIGINS = True  # en prod: usa CORS_ALLOWED_ORIGINS = [...]
+
+
+# ========================
+# ROLES
+# ========================
+# Segundos que se cachean los grupos de cada usuario entre requests (0 = solo por request).
+# Con varios workers usar un cache compartido (Redis/Memcached) para que la invalidación
+# al cambiar grupos llegue a todos.
+ROLES_CACHE_SECONDS = 0
+
+
+# ========================
+# EXPORTACIONES
+# ========================
+PDF_ENGINE = "xhtml2pdf"  # "reportlab": dibuja el PDF directo, mucho más rápido en reportes largos (?engine= por request)
+
+
+# ========================
+# SINCRONIZACIÓN (/api/notas/changes/)
+# ========================
+SYNC_MAX_ROWS = 1000  # notas por respuesta
+SYNC_TOMBSTONE_DAYS = 30  # días que se guardan las bajas; un 'since' más viejo obliga a re-listar
+# Los cambios de los últimos N segundos se informan en la llamada siguiente: cubre transacciones
+# abiertas (bulk / import) cuyas filas ya tienen `actualizado` pero todavía no se ven.
+SYNC_SAFETY_SECONDS = 10
+
+
+# ========================
+# ESTADÍSTICAS
+# ========================
+ESTADISTICAS_CACHE_SECONDS = 300  # /api/secciones/{id}/estadisticas/ (la clave cambia con las notas)
+
+
+# ========================
+# MACHINE LEARNING
+# ========================
+ML_MODEL_DIR = BASE_DIR / "ml_models"  # pipelines entrenados (joblib)
+ML_RETRAIN_MIN_CHANGE = 0.05  # fracción de filas con nota_final cambiadas para reentrenar
+ML_REGISTRY_CHECK_SECONDS = 30  # cada cuánto un worker revisa si su modelo quedó desactualizado
+# "full": reentrena la regresión leyendo toda la tabla de Notas.
+# "incremental": la ajusta desde estadísticos suficientes que se mantienen al guardar/borrar Notas
+# (correr `reconstruir_estadisticas_ml` periódicamente para refrescar las medianas de imputación).
+ML_LINEAR_TRAINING = "full"
+
+
+# ========================
+# ASGI (/api/async/notas/...: ML y exportaciones fuera del event loop)
+# ========================
+ASYNC_THREAD_WORKERS = 4  # hilos por proceso para las acciones pesadas (incluye el streaming)
+ASYNC_PROCESS_WORKERS = 2  # procesos para xhtml2pdf
+ASYNC_MAX_PENDING = 16  # trabajos en curso por proceso; por encima se responde 503
+
+
+# ========================
+# TRABAJOS EN SEGUNDO PLANO (/api/trabajos/, worker: manage.py procesar_trabajos)
+# ========================
+JOBS_DIR = BASE_DIR / "job_results"  # cuerpo de cada resultado (CSV/XLSX/PDF/JSON)
+JOBS_RESULT_TTL_HOURS = 24  # después se borran el trabajo y su archivo
+JOBS_POLL_SECONDS = 2.0  # espera del worker cuando la cola está vacía
+JOBS_TIMEOUT_SECONDS = 3600  # un trabajo en curso más viejo se da por perdido (worker caído)
+JOBS_PURGE_SECONDS = 300  # cada cuánto el worker purga vencidos y colgados
+
+
+# ========================
+# PERFILADO (core.profiling.ProfilingMiddleware)
+# ========================
+# Fracción de requests perfilados (0 = desactivado, el middleware ni se instancia; 0.01 = 1%).
+# Cada uno lleva la cabecera Server-Timing (total, db, ser, render) y deja una línea JSON en el
+# logger "gradebase.profiling" (WARNING si es lento o repite consultas).
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_SERVER_TIMING = True
+PROFILING_SLOW_MS = 500
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"gradebase.profiling": {"handlers": ["console"], "level": "INFO", "propagate": False}},
+}
+
+
+# ========================
+# MÉTRICAS (GET /api/metrics/, formato Prometheus)
+# ========================
+# Cada worker vuelca sus contadores a un archivo en METRICS_DIR y /api/metrics/ los suma;
+# conviene vaciar el directorio al desplegar. None = solo el proceso que atiende el scrape.
+METRICS_DIR = BASE_DIR / "metrics"
+METRICS_FLUSH_SECONDS = 1.0
+METRICS_TOKEN = None  # para el scraper: "Authorization: Bearer <token>"; sin token solo usuarios admin
+
+
+# ========================
+# BENCHMARK (manage.py benchmark_api / manage.py test --tag benchmark)
+# ========================
+# Reemplaza o extiende core.benchmark.DEFAULT_BUDGETS. Clave "escenario" o "rol:escenario";
+# métricas "queries", "ms" (mediana) y "peak_mb". Ej.: {"admin:export_csv": {"ms": 500}}
+BENCHMARK_BUDGETS = {}
@@ -21,7 +21,9 @@ from rest_framework_simplejwt.views import (
 )
 
 # Importar ViewSets
-from core.views import EstudianteViewSet, CursoViewSet, SeccionViewSet, NotaViewSet
+from core.views import EstudianteViewSet, CursoViewSet, SeccionViewSet, NotaViewSet, TrabajoViewSet
+from core.metrics import metrics_view
+from core import async_views
 
 # Router DRF
 router = routers.DefaultRouter()
@@ -29,6 +31,7 @@ router.register(r"estudiantes", EstudianteViewSet, basename="estudiante")
 router.register(r"cursos", CursoViewSet, basename="curso")
 router.register(r"secciones", SeccionViewSet, basename="seccion")
 router.register(r"notas", NotaViewSet, basename="nota")
+router.register(r"trabajos", TrabajoViewSet, basename="trabajo")
 
 urlpatterns = [
     path("", RedirectView.as_view(url="/api/docs/swagger/", permanent=False)),
@@ -38,12 +41,22 @@ urlpatterns = [
     # API principal
     path("api/", include(router.urls)),
 
+    # Variantes async (ASGI) de ML y exportaciones: pools acotados fuera del event loop
+    path("api/async/notas/ml/proyeccion/", async_views.ml_proyeccion, name="nota-ml-proyeccion-async"),
+    path("api/async/notas/ml/riesgo/", async_views.ml_riesgo, name="nota-ml-riesgo-async"),
+    path("api/async/notas/export/csv/", async_views.export_csv, name="nota-export-csv-async"),
+    path("api/async/notas/export/xlsx/", async_views.export_xlsx, name="nota-export-xlsx-async"),
+    path("api/async/notas/export/pdf/", async_views.export_pdf, name="nota-export-pdf-async"),
+
     # JWT (endpoints explícitos)
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     # opcional:
     # path("api/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
 
+    # Métricas (Prometheus)
+    path("api/metrics/", metrics_view, name="metrics"),
+
     # Schema JSON
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
 
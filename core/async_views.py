@@ -0,0 +1,142 @@
+# core/async_views.py
+"""
+Variantes async (ASGI) de las acciones pesadas de NotaViewSet: ML y exportaciones.
+
+La acción DRF original (autenticación, permisos, métricas) corre en un pool acotado
+de hilos; el HTML -> PDF de xhtml2pdf, que es CPU puro y retiene el GIL, en un pool de
+procesos. Las respuestas streaming se generan en ese mismo hilo (el cursor de la BD no
+cambia de hilo) y llegan al event loop por una cola acotada, con contrapresión. Si hay
+demasiados trabajos en curso se responde 503 con Retry-After.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import multiprocessing
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+
+from .exports import pdf_xhtml2pdf
+from .views import NotaViewSet
+
+_STREAM_QUEUE_CHUNKS = 8  # chunks en vuelo entre el hilo productor y el event loop
+_pools = {}
+_pools_lock = threading.Lock()
+_en_curso = 0
+
+
+def _pool(tipo):
+    with _pools_lock:
+        if tipo not in _pools:
+            if tipo == "hilos":
+                _pools[tipo] = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=getattr(settings, "ASYNC_THREAD_WORKERS", 4), thread_name_prefix="gradebase-async",
+                )
+            else:
+                # spawn: el hijo no hereda los hilos ni el event loop del proceso ASGI
+                _pools[tipo] = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=getattr(settings, "ASYNC_PROCESS_WORKERS", 2),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return _pools[tipo]
+
+
+class _ProcessPoolNotaViewSet(NotaViewSet):
+    """Igual que NotaViewSet, pero xhtml2pdf corre en el pool de procesos (el hilo solo espera)."""
+
+    def _html_to_pdf(self, html):
+        return _pool("procesos").submit(pdf_xhtml2pdf, html).result()
+
+
+def _liberar(_job):
+    global _en_curso
+    _en_curso -= 1
+
+
+def _accion_async(metodo, accion):
+    viewset = _ProcessPoolNotaViewSet.as_view({metodo: accion}, basename="nota", detail=False)
+
+    def trabajo(request, loop, lista, queue, cancelado):
+        """En un hilo del pool: atiende con la vista DRF y, si es streaming, produce los chunks."""
+        close_old_connections()
+        try:
+            response = viewset(request)
+            if hasattr(response, "render"):
+                response.render()  # el render de DRF también fuera del event loop
+            if not response.streaming:
+                loop.call_soon_threadsafe(lista.set_result, response)
+                return
+            chunks = iter(response.streaming_content)
+            loop.call_soon_threadsafe(lista.set_result, response)
+            for chunk in chunks:
+                if cancelado.is_set():  # la vista se canceló o el cliente cortó: no queda quien consuma
+                    return
+                fut = asyncio.run_coroutine_threadsafe(queue.put(chunk), loop)
+                while True:
+                    try:
+                        fut.result(timeout=1)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        if cancelado.is_set():
+                            fut.cancel()
+                            return
+        finally:
+            close_old_connections()
+
+    async def chunks_async(job, queue, cancelado):
+        try:
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({get, job}, return_when=asyncio.FIRST_COMPLETED)
+                if get in done:
+                    yield get.result()
+                    continue
+                get.cancel()
+                while not queue.empty():
+                    yield queue.get_nowait()
+                job.result()  # propaga errores del productor
+                return
+        finally:
+            cancelado.set()
+
+    async def vista(request):
+        global _en_curso
+        if _en_curso >= getattr(settings, "ASYNC_MAX_PENDING", 16):
+            response = JsonResponse({"detail": "Servidor ocupado, reintente en unos segundos."}, status=503)
+            response["Retry-After"] = "5"
+            return response
+
+        loop = asyncio.get_running_loop()
+        lista, queue, cancelado = loop.create_future(), asyncio.Queue(maxsize=_STREAM_QUEUE_CHUNKS), threading.Event()
+        ctx = contextvars.copy_context()
+        job = loop.run_in_executor(
+            _pool("hilos"), ctx.run, trabajo, request, loop, lista, queue, cancelado,
+        )
+        _en_curso += 1  # solo se modifica desde el event loop
+        job.add_done_callback(_liberar)
+        try:
+            await asyncio.wait({lista, job}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # el cliente cortó antes de que empiece la respuesta: chunks_async nunca va a correr,
+            # así que el productor se entera por acá y libera el hilo (y el cupo de _en_curso)
+            cancelado.set()
+            raise
+        if not lista.done():
+            job.result()  # la vista falló antes de responder: propaga la excepción
+        response = lista.result()
+        if response.streaming:
+            response.streaming_content = chunks_async(job, queue, cancelado)
+        return response
+
+    vista.csrf_exempt = True  # como las vistas DRF: la auth es por JWT
+    vista.__name__ = f"{accion}_async"
+    return vista
+
+
+ml_proyeccion = _accion_async("post", "ml_proyeccion")
+ml_riesgo = _accion_async("post", "ml_riesgo")
+export_csv = _accion_async("get", "export_csv")
+export_xlsx = _accion_async("get", "export_xlsx")
+export_pdf = _accion_async("get", "export_pdf")
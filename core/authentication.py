@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .permissions import get_roles, get_estudiante_id
+
+
+class RolesRefreshToken(RefreshToken):
+    """
+    Los claims 'roles', 'is_staff' y 'estudiante_id' van solo en el access token: cada uno
+    que se emite (login o /api/token/refresh/) los calcula del usuario en la BD. Así un
+    cambio de grupos aplica en el siguiente refresh y no al vencer el refresh token.
+    Los refresh emitidos con esos claims se corrigen al copiarlos.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = getattr(self, "user", None)
+        if user is None:
+            user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]})
+        access["roles"] = sorted(get_roles(user))
+        access["is_staff"] = user.is_staff
+        access["estudiante_id"] = get_estudiante_id(user)
+        return access
+
+
+class RolesJWTAuthentication(JWTAuthentication):
+    """
+    JWT que confía en los claims 'roles' y 'estudiante_id' del access token
+    (ver RolesRefreshToken): no consulta auth_user_groups ni Estudiante.
+    Tokens emitidos antes de los claims siguen funcionando con la consulta normal.
+    """
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if "roles" in validated_token:
+            user._roles_cache = frozenset(validated_token["roles"])
+        if "estudiante_id" in validated_token:
+            user._estudiante_id = validated_token["estudiante_id"]
+        return user
@@ -0,0 +1,255 @@
+# core/benchmark.py
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from .models import Seccion, Nota
+from .serializers import RolesTokenObtainPairSerializer
+from .sintetico import generar_datos
+
+ROLES = ("admin", "docente", "estudiante")
+
+# (escenario, método, url, body, filas esperadas si la respuesta no permite contarlas).
+# Las urls y bodies se completan con el contexto: {curso}, {seccion}, {seccion_id}, {nota_id}, {since}.
+ESCENARIOS = [
+    ("estudiantes_list", "get", "/api/estudiantes/", None, None),
+    ("cursos_list", "get", "/api/cursos/", None, None),
+    ("secciones_list", "get", "/api/secciones/", None, None),
+    ("seccion_estadisticas", "get", "/api/secciones/{seccion_id}/estadisticas/", None, None),
+    ("notas_list", "get", "/api/notas/", None, None),
+    ("notas_list_cursor", "get", "/api/notas/?paginacion=cursor", None, None),
+    ("notas_list_expand", "get", "/api/notas/?expand=all", None, None),
+    ("notas_list_fields", "get", "/api/notas/?fields=id,nota_final", None, None),
+    ("notas_filtro", "get", "/api/notas/?seccion__curso__codigo={curso}", None, None),
+    ("notas_detalle", "get", "/api/notas/{nota_id}/", None, None),
+    ("notas_changes", "get", "/api/notas/changes/?since={since}", None, None),
+    ("export_csv", "get", "/api/notas/export/csv/", None, None),
+    ("export_xlsx", "get", "/api/notas/export/xlsx/", None, None),
+    ("export_pdf", "get", "/api/notas/export/pdf/?curso={curso}&seccion={seccion}", None, "n_seccion"),
+    ("export_pdf_reportlab", "get", "/api/notas/export/pdf/?engine=reportlab", None, "n_total"),
+    ("ml_proyeccion", "post", "/api/notas/ml/proyeccion/", {"seccion_id": "{seccion_id}"}, None),
+    ("ml_proyeccion_fresh", "post", "/api/notas/ml/proyeccion/?fresh=1", {"seccion_id": "{seccion_id}"}, None),
+    ("ml_riesgo", "post", "/api/notas/ml/riesgo/", {"seccion_id": "{seccion_id}"}, None),
+    ("ml_riesgo_fresh", "post", "/api/notas/ml/riesgo/?fresh=1", {"seccion_id": "{seccion_id}"}, None),
+]
+
+# Presupuestos por defecto: consultas SQL de cada escenario (deterministas, sirven para
+# detectar N+1). BENCHMARK_BUDGETS en settings los reemplaza o extiende; la clave puede
+# ser "escenario" o "rol:escenario" y las métricas "queries", "ms" (mediana) y "peak_mb".
+DEFAULT_BUDGETS: Dict[str, Dict[str, float]] = {
+    # todas incluyen la consulta del usuario que hace JWTAuthentication
+    "estudiantes_list": {"queries": 3},
+    "cursos_list": {"queries": 3},
+    "secciones_list": {"queries": 4},
+    "seccion_estadisticas": {"queries": 4},  # + la versión de las notas (clave del cache)
+    "notas_list": {"queries": 4},
+    "notas_list_cursor": {"queries": 3},
+    "notas_list_expand": {"queries": 4},
+    "notas_list_fields": {"queries": 4},
+    "notas_filtro": {"queries": 4},
+    "notas_detalle": {"queries": 2},
+    "notas_changes": {"queries": 3},
+    "export_csv": {"queries": 3},
+    "export_xlsx": {"queries": 3},
+    "export_pdf": {"queries": 6},
+    "export_pdf_reportlab": {"queries": 6},
+    "ml_proyeccion": {"queries": 3},
+    "ml_proyeccion_fresh": {"queries": 8},
+    "ml_riesgo": {"queries": 3},
+    "ml_riesgo_fresh": {"queries": 8},
+}
+_RUIDO_MS = 5.0  # diferencias menores contra el baseline no cuentan como regresión
+
+
+def _client(user) -> APIClient:
+    """Cliente con un access token real: mide el mismo camino de autenticación que producción."""
+    client = APIClient()
+    access = RolesTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+    return client
+
+
+def _contexto(prefijo: str) -> Dict[str, Dict[str, Any]]:
+    """Usuario y parámetros de cada rol; la sección es del docente y el alumno está inscrito en ella."""
+    seccion = (Seccion.objects.select_related("curso", "profesor")
+               .filter(curso__codigo__startswith=f"{prefijo}-").order_by("id").first())
+    nota = (Nota.objects.select_related("estudiante__user")
+            .filter(seccion=seccion, estudiante__user__isnull=False).order_by("id").first())
+    admin, _ = User.objects.get_or_create(
+        username=f"{prefijo.lower()}_admin", defaults={"is_staff": True, "is_superuser": True}
+    )
+    usuarios = {"admin": admin, "docente": seccion.profesor, "estudiante": nota.estudiante.user}
+    visibles = {
+        "admin": Nota.objects.all(),
+        "docente": Nota.objects.filter(seccion__profesor=seccion.profesor),
+        "estudiante": Nota.objects.filter(estudiante=nota.estudiante),
+    }
+    since = quote((timezone.now() - timedelta(hours=1)).isoformat())
+    return {
+        rol: {
+            "user": usuarios[rol],
+            "curso": seccion.curso.codigo, "seccion": seccion.nombre, "seccion_id": seccion.pk,
+            "nota_id": nota.pk, "since": since,
+            "n_total": visibles[rol].count(), "n_seccion": visibles[rol].filter(seccion=seccion).count(),
+        }
+        for rol in ROLES
+    }
+
+
+def _ejecutar(client: APIClient, metodo: str, url: str, body):
+    t0 = time.perf_counter()
+    if body is None:
+        resp = getattr(client, metodo)(url)
+    else:
+        resp = getattr(client, metodo)(url, body, format="json")
+    content = b"".join(resp.streaming_content) if resp.streaming else resp.content
+    return resp, content, (time.perf_counter() - t0) * 1000
+
+
+def _filas(resp, content: bytes) -> Optional[int]:
+    ctype = resp.get("Content-Type", "")
+    if resp.status_code != 200:
+        return None
+    if "json" in ctype:
+        data = json.loads(content)
+        if isinstance(data, list):
+            return len(data)
+        for key in ("results", "cambios", "predictions"):
+            if key in data:
+                return len(data[key])
+        return 1
+    if "csv" in ctype:
+        return max(content.count(b"\n") - 1, 0)
+    if "spreadsheetml" in ctype:
+        wb = load_workbook(BytesIO(content), read_only=True)
+        filas = 0
+        for ws in wb.worksheets:
+            ws.reset_dimensions()  # el workbook write-only no guarda las dimensiones de la hoja
+            filas += sum(1 for _ in ws.iter_rows(min_row=2, values_only=True))
+        return filas
+    return None
+
+
+def _medir(client: APIClient, metodo: str, url: str, body, repeticiones: int) -> Dict[str, Any]:
+    """Primera llamada (en frío), `repeticiones` cronometradas, una con conteo de SQL y otra con tracemalloc."""
+    resp, content, ms_primera = _ejecutar(client, metodo, url, body)
+    tiempos = [_ejecutar(client, metodo, url, body)[2] for _ in range(repeticiones)]
+    reset_queries()  # con DEBUG el log de consultas es un deque acotado: si está lleno no se puede contar
+    with CaptureQueriesContext(connection) as queries:
+        resp, content, _ = _ejecutar(client, metodo, url, body)
+    n_queries = len(queries)  # se lee ya: el request siguiente vacía el log (request_started)
+    tracemalloc.start()
+    try:
+        _ejecutar(client, metodo, url, body)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "status": resp.status_code,
+        "ms_primera": round(ms_primera, 2),
+        "ms_p50": round(statistics.median(tiempos or [ms_primera]), 2),
+        "ms_min": round(min(tiempos or [ms_primera]), 2),
+        "ms_max": round(max(tiempos or [ms_primera]), 2),
+        "queries": n_queries,
+        "peak_mb": round(peak / 2**20, 3),
+        "bytes": len(content),
+        "filas": _filas(resp, content),
+    }
+
+
+def run_benchmark(
+    *,
+    cursos: int = 10,
+    secciones_por_curso: int = 3,
+    docentes: int = 10,
+    estudiantes: int = 2000,
+    notas_por_estudiante: int = 5,
+    repeticiones: int = 5,
+    seed: int = 42,
+    prefijo: str = "BENCH",
+    escenarios: Optional[List[str]] = None,
+    roles: Optional[List[str]] = None,
+    progreso: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Siembra un dataset sintético y mide cada escenario con cada rol sobre la BD actual
+    (el comando usa una BD de prueba descartable). Devuelve el reporte serializable a JSON.
+    """
+    log = progreso or (lambda msg: None)
+    dataset = generar_datos(
+        cursos=cursos, secciones_por_curso=secciones_por_curso, docentes=docentes, estudiantes=estudiantes,
+        notas_por_estudiante=notas_por_estudiante, seed=seed, prefijo=prefijo, progreso=log,
+    )
+    ctx = _contexto(prefijo)
+    resultados = []
+    for rol in roles or ROLES:
+        c = ctx[rol]
+        client = _client(c["user"])
+        for nombre, metodo, url, body, filas_esperadas in ESCENARIOS:
+            if escenarios and nombre not in escenarios:
+                continue
+            url = url.format(**c)
+            body = {k: v.format(**c) for k, v in body.items()} if body else None
+            r = _medir(client, metodo, url, body, repeticiones)
+            if r["filas"] is None and filas_esperadas and r["status"] == 200:
+                r["filas"] = c[filas_esperadas]
+            r["filas_s"] = round(r["filas"] / (r["ms_p50"] / 1000), 1) if r["filas"] and r["ms_p50"] else None
+            resultados.append({"rol": rol, "escenario": nombre, "metodo": metodo.upper(), "url": url, **r})
+            log(f"{rol:<10} {nombre:<22} {r['status']} {r['ms_p50']:>9.1f} ms {r['queries']:>3} q "
+                f"{r['peak_mb']:>8.2f} MB")
+    return {
+        "generado": timezone.now().isoformat(),
+        "entorno": {
+            "python": platform.python_version(), "django": django.get_version(),
+            "bd": connection.vendor, "repeticiones": repeticiones,
+        },
+        "dataset": dataset,
+        "resultados": resultados,
+    }
+
+
+def verificar(resultados: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None,
+              tolerancia: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Violaciones de presupuesto (DEFAULT_BUDGETS + BENCHMARK_BUDGETS), respuestas 5xx y,
+    si se da un reporte `baseline`, regresiones contra él: más consultas o una mediana más
+    de `tolerancia` por encima.
+    """
+    budgets = {**DEFAULT_BUDGETS, **getattr(settings, "BENCHMARK_BUDGETS", {})}
+    previos = {(r["rol"], r["escenario"]): r for r in (baseline or {}).get("resultados", [])}
+    violaciones = []
+
+    def _violacion(r, metrica, valor, limite, origen):
+        violaciones.append({"rol": r["rol"], "escenario": r["escenario"], "metrica": metrica,
+                            "valor": valor, "limite": limite, "origen": origen})
+
+    for r in resultados:
+        if r["status"] >= 500:
+            _violacion(r, "status", r["status"], 500, "respuesta")
+        b = {**budgets.get(r["escenario"], {}), **budgets.get(f"{r['rol']}:{r['escenario']}", {})}
+        for metrica, campo in (("queries", "queries"), ("ms", "ms_p50"), ("peak_mb", "peak_mb")):
+            if metrica in b and r[campo] > b[metrica]:
+                _violacion(r, metrica, r[campo], b[metrica], "presupuesto")
+        prev = previos.get((r["rol"], r["escenario"]))
+        if prev:
+            if r["queries"] > prev["queries"]:
+                _violacion(r, "queries", r["queries"], prev["queries"], "baseline")
+            limite = prev["ms_p50"] * (1 + tolerancia)
+            if r["ms_p50"] > limite and r["ms_p50"] - prev["ms_p50"] > _RUIDO_MS:
+                _violacion(r, "ms", r["ms_p50"], round(limite, 2), "baseline")
+    return violaciones
@@ -0,0 +1,63 @@
+# core/bulk.py
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+
+from .models import Nota
+from .signals import notas_cambiadas
+from . import ml
+
+NOTA_FIELDS = ["avance1", "avance2", "avance3", "participacion", "proyecto_final", "nota_final"]
+UPSERT_BATCH = 500
+BULK_MAX_ROWS = 1000  # filas por request en /api/notas/bulk/
+
+
+def upsert_notas(rows: List[Dict]) -> Tuple[int, int]:
+    """
+    Inserta o actualiza Notas en una sola transacción usando el unique (estudiante, seccion).
+    Cada fila trae 'estudiante' y 'seccion' (ids) y solo los campos de nota a escribir:
+    los omitidos conservan su valor (o quedan NULL si la fila es nueva).
+    Como bulk_create no dispara señales, aquí se invalidan predicciones y se actualizan
+    los estadísticos de la regresión incremental. Devuelve (creadas, actualizadas).
+    """
+    if not rows:
+        return 0, 0
+    keys = {(r["estudiante"], r["seccion"]) for r in rows}
+    seccion_ids = {s for _, s in keys}
+
+    # agrupar por conjunto de campos enviados: un bulk_create (upsert) por grupo
+    groups = defaultdict(list)
+    for r in rows:
+        groups[tuple(f for f in NOTA_FIELDS if f in r)].append(r)
+
+    with transaction.atomic():
+        existing = {
+            (e, s): dict(zip(NOTA_FIELDS, vals))
+            for e, s, *vals in Nota.objects.filter(
+                seccion_id__in=seccion_ids, estudiante_id__in={e for e, _ in keys}
+            ).order_by().values_list("estudiante_id", "seccion_id", *NOTA_FIELDS)
+            if (e, s) in keys
+        }
+        for fields, group in groups.items():
+            Nota.objects.bulk_create(
+                [Nota(estudiante_id=r["estudiante"], seccion_id=r["seccion"], **{f: r[f] for f in fields})
+                 for r in group],
+                batch_size=UPSERT_BATCH,
+                update_conflicts=True,
+                unique_fields=["estudiante", "seccion"],
+                update_fields=[*fields, "actualizado"],
+            )
+
+        if ml.incremental_linear_enabled():
+            old, new = [], []
+            for r in rows:
+                prev = existing.get((r["estudiante"], r["seccion"]))
+                merged = {**(prev or dict.fromkeys(NOTA_FIELDS)), **{f: r[f] for f in NOTA_FIELDS if f in r}}
+                old.append(tuple(prev[f] for f in NOTA_FIELDS) if prev else None)
+                new.append(tuple(merged[f] for f in NOTA_FIELDS))
+            ml.apply_regression_delta(old, new)
+        notas_cambiadas(seccion_ids)
+
+    created = len(keys - existing.keys())
+    return created, len(keys) - created
@@ -0,0 +1,66 @@
+# core/conditional.py
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    ETag para list (y además Last-Modified en retrieve), calculados con agregados baratos
+    del queryset visible para el usuario (Max(actualizado) + Count): si el cliente ya tiene
+    esa versión se responde 304 sin serializar nada. Solo reflejan cambios en las filas del
+    propio modelo, así que las respuestas con datos de otras tablas (conditional_enabled()
+    en False) se sirven siempre completas. Los listados no mandan Last-Modified: una baja
+    no mueve el Max(actualizado), solo el Count del ETag.
+    """
+    conditional_timestamp_field = "actualizado"
+
+    def conditional_enabled(self) -> bool:
+        return True
+
+    def _etag(self, *parts):
+        user = self.request.user
+        raw = "|".join(str(p) for p in (
+            user.pk, user.is_staff, self.request.get_full_path(), self.request.META.get("HTTP_ACCEPT", ""), *parts
+        ))
+        return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+    def conditional_response(self, qs, render):
+        """`render()` solo se ejecuta si el cliente no tiene ya la versión vigente de `qs`."""
+        if self.request.method not in SAFE_METHODS or not self.conditional_enabled():
+            return render()
+        agg = qs.order_by().aggregate(ultimo=Max(self.conditional_timestamp_field), n=Count("pk"))
+        ultimo = agg["ultimo"]
+        return self._with_validators(self._etag(agg["n"], ultimo.isoformat() if ultimo else ""), None, render)
+
+    def _with_validators(self, etag, ultimo, render):
+        last_modified = int(ultimo.timestamp()) if ultimo else None
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return self.conditional_response(
+            self.filter_queryset(self.get_queryset()), lambda: parent(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if not self.conditional_enabled():
+            return Response(self.get_serializer(instance).data)
+        ultimo = getattr(instance, self.conditional_timestamp_field)
+        return self._with_validators(
+            self._etag(instance.pk, ultimo.isoformat()), ultimo,
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
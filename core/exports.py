@@ -0,0 +1,177 @@
+# core/exports.py
+import csv
+import io
+import re
+import tempfile
+import zlib
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional
+
+from django.db.models import QuerySet
+from django.utils import timezone
+from openpyxl import Workbook
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from xhtml2pdf import pisa
+
+EXPORT_HEADERS = ['Codigo', 'Estudiante', 'Curso', 'Seccion', 'Av1', 'Av2', 'Av3', 'Participacion', 'Proyecto', 'Final']
+_EXPORT_COLUMNS = (
+    "estudiante__codigo", "estudiante__nombre", "estudiante__apellido",
+    "seccion__curso__codigo", "seccion__nombre",
+    "avance1", "avance2", "avance3", "participacion", "proyecto_final", "nota_final",
+)
+EXPORT_CHUNK_ROWS = 2000  # filas por ida a la BD (cursor del lado del servidor donde el motor lo soporta)
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024  # el XLSX pasa a disco al superar este tamaño
+
+
+def export_rows(qs: QuerySet, chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[list]:
+    """Filas en el layout de EXPORT_HEADERS sin instanciar modelos."""
+    for codigo, nombre, apellido, curso, seccion, *notas in (
+        qs.values_list(*_EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+    ):
+        yield [codigo, f"{nombre} {apellido}", curso, seccion, *notas]
+
+
+def peek(rows: Iterator) -> Optional[Iterator]:
+    """Devuelve el iterador intacto, o None si está vacío (evita un qs.exists() aparte)."""
+    try:
+        first = next(rows)
+    except StopIteration:
+        return None
+    return chain([first], rows)
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de escribirla."""
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows: Iterable[list], rows_per_chunk: int = 500) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    rows = iter(rows)
+    yield writer.writerow(EXPORT_HEADERS).encode("utf-8")
+    while True:
+        block = list(islice(rows, rows_per_chunk))
+        if not block:
+            return
+        yield "".join(writer.writerow(r) for r in block).encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+def _sheet_title(curso, seccion, used) -> str:
+    # Excel: máx. 31 caracteres, sin []:*?/\ y sin repetir
+    base = re.sub(r"[\[\]:*?/\\]", "_", f"{curso}-{seccion}")[:31]
+    title, i = base, 1
+    while title in used:
+        i += 1
+        title = f"{base[:31 - len(str(i)) - 1]}~{i}"
+    used.add(title)
+    return title
+
+
+def xlsx_file(rows: Iterable[list], por_seccion: bool = False):
+    """
+    Escribe el XLSX con un workbook write-only (las celdas no quedan en memoria) en un
+    SpooledTemporaryFile y lo devuelve rebobinado, listo para FileResponse.
+    Con por_seccion=True las filas deben venir ordenadas por curso y sección: una hoja por sección.
+    """
+    wb = Workbook(write_only=True)
+    ws, current, used = None, None, set()
+    for row in rows:
+        key = (row[2], row[3])
+        if ws is None or (por_seccion and key != current):
+            ws = wb.create_sheet(_sheet_title(*key, used) if por_seccion else "Notas")
+            ws.append(EXPORT_HEADERS)
+            current = key
+        ws.append(row)
+    if ws is None:
+        wb.create_sheet("Notas").append(EXPORT_HEADERS)
+
+    out = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES)
+    wb.save(out)
+    out.seek(0)
+    return out
+
+
+# =========================
+# PDF (ReportLab)
+# =========================
+# Mismo reporte que templates/reportes/notas_pdf.html, dibujado con platypus.
+# La tabla se parte en bloques de ~una página: cada Table chica se mide y corta
+# rápido, en vez de una sola tabla gigante que ReportLab re-divide página a página.
+
+PDF_ENGINES = ("xhtml2pdf", "reportlab")
+PDF_ROWS_PER_TABLE = 45
+_PDF_HEADERS = ['Código', 'Estudiante', 'Curso', 'Sección', 'Av1', 'Av2', 'Av3', 'Participación', 'Proyecto', 'Final']
+_PDF_COL_WEIGHTS = [16, 30, 14, 12, 8, 8, 8, 12, 12, 10]  # anchos relativos del template HTML
+
+_STYLE_TITLE = ParagraphStyle("titulo", fontName="Helvetica-Bold", fontSize=18, leading=22, spaceAfter=4)
+_STYLE_META = ParagraphStyle("meta", fontName="Helvetica", fontSize=10, leading=12, textColor=colors.HexColor("#555555"))
+_STYLE_SECTION = ParagraphStyle("seccion", fontName="Helvetica", fontSize=14, leading=17, spaceBefore=10, spaceAfter=4)
+_TABLE_STYLE = TableStyle([
+    ("FONT", (0, 0), (-1, -1), "Helvetica", 8),
+    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 8),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#efefef")),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#333333")),
+    ("ALIGN", (4, 1), (-1, -1), "RIGHT"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+
+def report_rows(qs: QuerySet, chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[list]:
+    """Filas del reporte PDF: 'Apellido, Nombre' y '-' para notas vacías."""
+    for codigo, nombre, apellido, curso, seccion, *notas in (
+        qs.values_list(*_EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+    ):
+        yield [codigo, f"{apellido}, {nombre}", curso, seccion, *("-" if v is None else v for v in notas)]
+
+
+def pdf_reportlab(dest, rows: Iterable[list], *, usuario, generado_en, curso, seccion, promedio) -> None:
+    doc = SimpleDocTemplate(dest, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=20 * mm, bottomMargin=20 * mm, title="Reporte de Notas")
+    total = sum(_PDF_COL_WEIGHTS)
+    col_widths = [doc.width * w / total for w in _PDF_COL_WEIGHTS]
+
+    titulo = f"Curso: {curso}" + (f" — Sección: {seccion}" if seccion else "")
+    story = [
+        Paragraph("Reporte de Notas", _STYLE_TITLE),
+        Paragraph(f"Generado por: {usuario} | Fecha: {timezone.localtime(generado_en):%Y-%m-%d %H:%M}", _STYLE_META),
+        Paragraph(titulo, _STYLE_SECTION),
+    ]
+    rows = iter(rows)
+    while True:
+        block = list(islice(rows, PDF_ROWS_PER_TABLE))
+        if not block:
+            break
+        story.append(Table([_PDF_HEADERS, *block], colWidths=col_widths, repeatRows=1, style=_TABLE_STYLE))
+    promedio_txt = f"{promedio:.2f}" if promedio is not None else ""
+    story += [Spacer(1, 10), Paragraph(f"Promedio general (nota final): {promedio_txt}", _STYLE_META)]
+
+    def _page_number(canvas, doc):
+        canvas.setFont("Helvetica", 8)
+        canvas.drawRightString(doc.pagesize[0] - 15 * mm, 10 * mm, f"Página {doc.page}")
+
+    doc.build(story, onFirstPage=_page_number, onLaterPages=_page_number)
+
+
+def pdf_xhtml2pdf(html: str) -> Optional[bytes]:
+    """
+    HTML -> PDF con xhtml2pdf; None si falla. Solo recibe y devuelve datos simples para
+    poder correr en un pool de procesos (no toca la BD ni los settings).
+    """
+    out = io.BytesIO()
+    if pisa.CreatePDF(src=html, dest=out, encoding='utf-8').err:
+        return None
+    return out.getvalue()
@@ -0,0 +1,53 @@
+# core/fieldsets.py
+from rest_framework.exceptions import ValidationError
+
+
+def _names(raw):
+    return {n.strip() for n in (raw or "").split(",") if n.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b (solo esos campos) / ?omit=c,d (todos menos esos) en list y retrieve:
+    recorta la salida del serializer (context["fields"]) y las columnas del SELECT con
+    only(). Siempre se leen la pk, el campo de ETag y el orden del cursor, aunque no se
+    devuelvan, para que no haya consultas diferidas por fila.
+    """
+    sparse_actions = ("list", "retrieve")
+    sparse_required_fields = ()
+
+    def sparse_fieldset(self):
+        """Conjunto de campos a devolver, o None si no se pidió recorte."""
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = None
+            params = self.request.query_params if self.request is not None else {}
+            fields, omit = _names(params.get("fields")), _names(params.get("omit"))
+            if self.action in self.sparse_actions and (fields or omit):
+                disponibles = set(self.get_serializer_class()().fields)
+                invalidos = (fields | omit) - disponibles
+                if invalidos:
+                    raise ValidationError({"fields": f"Campos desconocidos: {', '.join(sorted(invalidos))}."})
+                self._sparse_fieldset = (fields or disponibles) - omit
+        return self._sparse_fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.sparse_fieldset()
+        return context
+
+    def _sparse_columns(self, model):
+        keep = self.sparse_fieldset()
+        if keep is None:
+            return None
+        columnas = {f.name for f in model._meta.concrete_fields}
+        requeridos = {model._meta.pk.name, *self.sparse_required_fields}
+        if getattr(self, "conditional_timestamp_field", None):
+            requeridos.add(self.conditional_timestamp_field)
+        if getattr(self, "_wants_cursor", lambda: False)():
+            requeridos.update(f.lstrip("-") for f in self.paginator.ordering)
+        return sorted((keep | requeridos) & columnas)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        columnas = self._sparse_columns(queryset.model)
+        return queryset.only(*columnas) if columnas else queryset
@@ -0,0 +1,130 @@
+# core/importers.py
+import csv
+import io
+import math
+from itertools import islice
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from openpyxl import load_workbook
+
+from .bulk import upsert_notas, NOTA_FIELDS
+from .exports import EXPORT_HEADERS
+from .models import Estudiante, Seccion, nota_validators
+
+IMPORT_FORMATS = ("csv", "xlsx")
+IMPORT_BATCH = 500
+_MAX_ERRORS_REPORTED = 1000
+_KEY_COLUMNS = 4  # Codigo, Estudiante, Curso, Seccion; las notas pueden faltar al final
+
+
+def _iter_csv(fileobj) -> Iterator[Tuple[int, list]]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        yield from enumerate(csv.reader(text), start=1)
+    finally:
+        text.detach()  # no cerrar el archivo subido al terminar
+
+
+def _iter_xlsx(fileobj) -> Iterator[Tuple[int, list]]:
+    # read-only: las filas se leen del XML a medida que se iteran
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:  # el export por sección trae una hoja (con encabezado) por sección
+            for i, row in enumerate(ws.iter_rows(values_only=True), start=1):
+                yield i, list(row)
+    finally:
+        wb.close()
+
+
+def _is_header(row: list) -> bool:
+    return [str(c or "").strip().lower() for c in row[:len(EXPORT_HEADERS)]] == [h.lower() for h in EXPORT_HEADERS]
+
+
+def _parse_nota(value) -> Optional[float]:
+    if value is None or (isinstance(value, str) and value.strip() in ("", "-")):
+        return None
+    v = float(value)
+    if not math.isfinite(v):  # NaN pasaría los validadores de rango: toda comparación da False
+        raise ValueError(f"'{value}' no es un número.")
+    for validator in nota_validators:
+        validator(v)
+    return v
+
+
+def import_notas(fileobj, formato: str, user=None, dry_run: bool = False) -> Dict:
+    """
+    Importa notas con el mismo layout que export_csv/export_xlsx (Codigo, Estudiante, Curso,
+    Seccion, Av1..Final). Estudiante/Sección se resuelven con mapas en memoria (una consulta
+    cada uno) y las filas válidas se escriben en lotes con upsert_notas. Si `user` es docente,
+    solo acepta filas de sus secciones. Devuelve un reporte con errores por fila.
+    """
+    if formato not in IMPORT_FORMATS:
+        raise ValueError(f"Formato inválido. Opciones: {', '.join(IMPORT_FORMATS)}.")
+
+    estudiantes = dict(Estudiante.objects.values_list("codigo", "id"))
+    secciones = {
+        (curso, nombre): (sid, profesor_id)
+        for curso, nombre, sid, profesor_id in Seccion.objects.values_list(
+            "curso__codigo", "nombre", "id", "profesor_id")
+    }
+    solo_profesor = None
+    if user is not None and not user.is_staff:
+        from .permissions import is_in_group
+        if is_in_group(user, "DOCENTE"):
+            solo_profesor = user.id
+
+    report = {"filas": 0, "validas": 0, "creadas": 0, "actualizadas": 0, "errores": [], "n_errores": 0}
+
+    def _error(fila, msg):
+        report["n_errores"] += 1
+        if len(report["errores"]) < _MAX_ERRORS_REPORTED:
+            report["errores"].append({"fila": fila, "error": msg})
+
+    def _valid_rows() -> Iterator[Dict]:
+        rows = _iter_csv(fileobj) if formato == "csv" else _iter_xlsx(fileobj)
+        for fila, row in rows:
+            if not any(c not in (None, "") for c in row) or _is_header(row):
+                continue
+            report["filas"] += 1
+            if len(row) < _KEY_COLUMNS:
+                _error(fila, f"Se esperaban al menos {_KEY_COLUMNS} columnas (Codigo, Estudiante, Curso, Seccion).")
+                continue
+            # el XLSX write-only omite las celdas vacías del final: notas pendientes
+            row = row + [None] * (len(EXPORT_HEADERS) - len(row))
+            codigo, _nombre, curso, seccion, *valores = row[:len(EXPORT_HEADERS)]
+            estudiante_id = estudiantes.get(str(codigo or "").strip())
+            if estudiante_id is None:
+                _error(fila, f"Estudiante '{codigo}' no existe.")
+                continue
+            sec = secciones.get((str(curso or "").strip(), str(seccion or "").strip()))
+            if sec is None:
+                _error(fila, f"Sección '{curso}/{seccion}' no existe.")
+                continue
+            if solo_profesor is not None and sec[1] != solo_profesor:
+                _error(fila, f"La sección '{curso}/{seccion}' es de otro docente.")
+                continue
+            try:
+                notas = [_parse_nota(v) for v in valores]
+            except (TypeError, ValueError) as e:
+                _error(fila, f"Nota inválida: {e}")
+                continue
+            except ValidationError as e:
+                _error(fila, f"Nota fuera de rango: {'; '.join(e.messages)}")
+                continue
+            report["validas"] += 1
+            yield {"estudiante": estudiante_id, "seccion": sec[0], **dict(zip(NOTA_FIELDS, notas))}
+
+    rows = _valid_rows()
+    while True:
+        batch = list(islice(rows, IMPORT_BATCH))
+        if not batch:
+            break
+        if dry_run:
+            continue
+        # dentro de un lote gana la última fila de cada (estudiante, seccion)
+        batch = list({(r["estudiante"], r["seccion"]): r for r in batch}.values())
+        creadas, actualizadas = upsert_notas(batch)
+        report["creadas"] += creadas
+        report["actualizadas"] += actualizadas
+    return report
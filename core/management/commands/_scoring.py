@@ -0,0 +1,72 @@
+# core/management/commands/_scoring.py
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Seccion
+from core.ml import score_secciones
+
+
+class ScoringCommand(BaseCommand):
+    """
+    Base de proyectar_notas / riesgo_desaprobacion: una sección o lote (--all / --curso).
+    Las subclases definen kind, predict_one (función de core.ml para una sección) y los
+    formatos de las métricas y de cada predicción (str.format con sus claves).
+    """
+    kind = None
+    predict_one = None
+    metrics_format = ""
+    prediction_format = ""
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--seccion_id", type=int, help="ID de la sección")
+        target.add_argument("--all", action="store_true", help="Todas las secciones")
+        target.add_argument("--curso", help="Código de curso: todas sus secciones")
+        parser.add_argument("--workers", type=int, default=1, help="Procesos para el scoring por lotes")
+        parser.add_argument("--batch-rows", type=int, default=5000, help="Filas aprox. por lote")
+        parser.add_argument("--no-guardar", action="store_true",
+                            help="No guardar las predicciones del lote en PrediccionNota")
+
+    def handle(self, *args, **options):
+        if options["seccion_id"] is not None:
+            return self.handle_one(options["seccion_id"])
+
+        secciones = Seccion.objects.select_related("curso").order_by("curso__codigo", "nombre")
+        if options["curso"]:
+            secciones = secciones.filter(curso__codigo=options["curso"])
+        secciones = {s.id: s for s in secciones}
+        if not secciones:
+            raise CommandError("No hay secciones para puntuar.")
+
+        try:
+            out = score_secciones(self.kind, list(secciones), workers=options["workers"],
+                                  batch_rows=options["batch_rows"], store=not options["no_guardar"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(self.metrics_format.format(**out["metrics"])))
+        for sid, preds in out["por_seccion"].items():
+            s = secciones[sid]
+            self.stdout.write(f"[{s.curso.codigo}/{s.nombre}] {len(preds)} estudiantes")
+            if options["verbosity"] >= 2:
+                for p in preds:
+                    self.stdout.write(f"  {self.prediction_format.format(**p)}")
+
+        rate = out["n_rows"] / out["elapsed"] if out["elapsed"] > 0 else float("inf")
+        self.stdout.write(self.style.SUCCESS(
+            f"Secciones: {len(out['por_seccion'])}. Filas: {out['n_rows']}. "
+            f"Tiempo: {out['elapsed']:.2f}s ({rate:,.0f} filas/s, workers={options['workers']})."
+        ))
+
+    def handle_one(self, seccion_id):
+        try:
+            seccion = Seccion.objects.select_related("curso", "profesor").get(pk=seccion_id)
+        except Seccion.DoesNotExist:
+            raise CommandError("Sección no encontrada.")
+
+        try:
+            out = self.predict_one(seccion)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(self.metrics_format.format(**out["metrics"])))
+        for p in out["predictions"]:
+            self.stdout.write(self.prediction_format.format(**p))
@@ -0,0 +1,73 @@
+# core/management/commands/benchmark_api.py
+import json
+import logging
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import metrics
+from core.benchmark import run_benchmark, verificar, ESCENARIOS, ROLES
+
+
+class Command(BaseCommand):
+    help = ("Benchmark de los endpoints sobre una BD de prueba descartable: tiempo, consultas SQL, pico de memoria "
+            "y filas/s por escenario y rol, en un reporte JSON. Falla si se excede un presupuesto o el baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cursos", type=int, default=10)
+        parser.add_argument("--secciones-por-curso", type=int, default=3)
+        parser.add_argument("--docentes", type=int, default=10)
+        parser.add_argument("--estudiantes", type=int, default=2000)
+        parser.add_argument("--notas-por-estudiante", type=int, default=5)
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--escenario", action="append", choices=[e[0] for e in ESCENARIOS],
+                            help="Repetible; por defecto todos")
+        parser.add_argument("--rol", action="append", choices=ROLES, help="Repetible; por defecto todos")
+        parser.add_argument("--salida", default="benchmark.json", help="Archivo del reporte JSON")
+        parser.add_argument("--baseline", help="Reporte JSON previo contra el que comparar")
+        parser.add_argument("--tolerancia", type=float, default=0.25,
+                            help="Aumento de la mediana admitido respecto del baseline (0.25 = 25%%)")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer el baseline: {e}")
+
+        # BD de prueba (como el test runner); modelos de ML y métricas en directorios temporales
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        logging.disable(logging.WARNING)  # los 403 esperados del rol estudiante y avisos de xhtml2pdf
+        try:
+            with tempfile.TemporaryDirectory() as ml_dir, tempfile.TemporaryDirectory() as metrics_dir, \
+                    override_settings(ML_MODEL_DIR=ml_dir, METRICS_DIR=metrics_dir):
+                try:
+                    report = run_benchmark(
+                        cursos=options["cursos"], secciones_por_curso=options["secciones_por_curso"],
+                        docentes=options["docentes"], estudiantes=options["estudiantes"],
+                        notas_por_estudiante=options["notas_por_estudiante"], repeticiones=options["repeticiones"],
+                        seed=options["seed"], escenarios=options["escenario"], roles=options["rol"],
+                        progreso=self.stdout.write,
+                    )
+                finally:
+                    metrics.descartar()  # que el volcado al salir no las lleve al METRICS_DIR real
+        finally:
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report["violaciones"] = verificar(report["resultados"], baseline, options["tolerancia"])
+        with open(options["salida"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        for v in report["violaciones"]:
+            self.stderr.write(f"{v['rol']}:{v['escenario']} {v['metrica']}={v['valor']} > {v['limite']} ({v['origen']})")
+        if report["violaciones"]:
+            raise CommandError(f"{len(report['violaciones'])} presupuesto(s) excedido(s); ver {options['salida']}.")
+        self.stdout.write(self.style.SUCCESS(
+            f"OK: {len(report['resultados'])} mediciones dentro de presupuesto. Reporte: {options['salida']}."
+        ))
@@ -0,0 +1,24 @@
+# core/management/commands/entrenar_modelos.py
+from django.core.management.base import BaseCommand, CommandError
+from core.ml import get_model
+
+KINDS = ["linear_regression", "logistic_regression"]
+
+
+class Command(BaseCommand):
+    help = "Entrena (si hace falta) y guarda en disco los modelos de proyección y riesgo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modelo", choices=KINDS, help="Solo este modelo (por defecto ambos)")
+        parser.add_argument("--force", action="store_true", help="Reentrena aunque el modelo esté al día")
+
+    def handle(self, *args, **options):
+        kinds = [options["modelo"]] if options["modelo"] else KINDS
+        for kind in kinds:
+            try:
+                bundle = get_model(kind, force_retrain=options["force"])
+            except ValueError as e:
+                raise CommandError(f"{kind}: {e}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{kind}: versión {bundle['version']} ({bundle['n_train']} filas de entrenamiento)"
+            ))
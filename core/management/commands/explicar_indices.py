@@ -0,0 +1,74 @@
+# core/management/commands/explicar_indices.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.exports import _EXPORT_COLUMNS
+from core.ml import FEATURES, _PRED_COLUMNS, _fetch_training_qs
+from core.models import Nota, Seccion
+
+
+def _consultas():
+    """Consultas con la misma forma que generan los endpoints (parámetros tomados de la BD)."""
+    sec = Seccion.objects.select_related("curso").exclude(profesor=None).first() or Seccion.objects.select_related("curso").first()
+    sid = sec.id if sec else 0
+    curso, nombre = (sec.curso.codigo, sec.nombre) if sec else ("", "")
+    profesor_id = sec.profesor_id if sec else 0
+    estudiante_id = Nota.objects.values_list("estudiante_id", flat=True).first() or 0
+    return [
+        ("GET /api/notas/ (admin)", Nota.objects.all()[:20]),
+        ("GET /api/notas/ (docente)", Nota.objects.filter(seccion__profesor_id=profesor_id)[:20]),
+        ("GET /api/notas/ (estudiante)", Nota.objects.filter(estudiante_id=estudiante_id)[:20]),
+        ("GET /api/notas/?paginacion=cursor", Nota.objects.order_by("-actualizado", "-id")[:21]),
+        ("GET /api/notas/export/* ?curso&seccion",
+         Nota.objects.filter(seccion__curso__codigo=curso, seccion__nombre=nombre).values_list(*_EXPORT_COLUMNS)),
+        ("POST /api/notas/ml/* (entrenamiento)",
+         _fetch_training_qs().order_by().values_list(*FEATURES, "nota_final")),
+        ("POST /api/notas/ml/* (sección)",
+         Nota.objects.filter(seccion_id=sid).values_list(*_PRED_COLUMNS, *FEATURES)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra EXPLAIN (QUERY PLAN) y tiempo de las consultas de cada endpoint con y sin los "
+        "índices compuestos de Nota. El 'antes' borra los índices dentro de una transacción que "
+        "se revierte: usar sobre una copia o staging, no sobre producción con tráfico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5, help="Corridas para la mediana de tiempo")
+
+    def _medir(self, consultas, repeticiones):
+        out = []
+        for nombre, qs in consultas:
+            tiempos = []
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                list(qs.all())  # .all(): clon sin cache de resultados
+                tiempos.append(time.perf_counter() - t0)
+            out.append((nombre, qs.explain(), statistics.median(tiempos) * 1000))
+        return out
+
+    def handle(self, *args, **options):
+        consultas = _consultas()
+        indices = Nota._meta.indexes
+        editor = connection.schema_editor()  # solo para la plantilla DROP INDEX del motor
+        qn = connection.ops.quote_name
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in indices:
+                    cursor.execute(editor.sql_delete_index % {
+                        "table": qn(Nota._meta.db_table), "name": qn(index.name)})
+            antes = self._medir(consultas, options["repeticiones"])
+            transaction.set_rollback(True)  # los índices vuelven a existir
+        despues = self._medir(consultas, options["repeticiones"])
+
+        self.stdout.write(f"Índices evaluados: {', '.join(i.name for i in indices)}\n")
+        for (nombre, plan_a, ms_a), (_, plan_d, ms_d) in zip(antes, despues):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {nombre}"))
+            self.stdout.write(f"-- antes ({ms_a:.2f} ms)\n{plan_a}")
+            self.stdout.write(f"-- después ({ms_d:.2f} ms)\n{plan_d}\n")
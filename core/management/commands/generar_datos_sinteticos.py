@@ -0,0 +1,43 @@
+# core/management/commands/generar_datos_sinteticos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sintetico import generar_datos
+
+
+class Command(BaseCommand):
+    help = ("Genera datos sintéticos para pruebas de carga (cursos, secciones, docentes, estudiantes y notas) "
+            "con inserciones masivas; reproducible con --seed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cursos", type=int, default=10)
+        parser.add_argument("--secciones-por-curso", type=int, default=3)
+        parser.add_argument("--docentes", type=int, default=10)
+        parser.add_argument("--estudiantes", type=int, default=1000)
+        parser.add_argument("--notas-por-estudiante", type=int, default=3, help="Secciones distintas por estudiante")
+        parser.add_argument("--media", type=float, default=13.0, help="Media del nivel de los estudiantes (0-20)")
+        parser.add_argument("--desviacion", type=float, default=3.0, help="Desviación del nivel entre estudiantes")
+        parser.add_argument("--ruido", type=float, default=1.5, help="Variación de cada componente alrededor del nivel")
+        parser.add_argument("--pendientes", type=float, default=0.2,
+                            help="Fracción de notas en curso (sin avance3, proyecto ni final)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefijo", default="SYN", help="Prefijo de códigos y usernames (no debe existir)")
+        parser.add_argument("--password", default="sintetico", help="Contraseña de todos los usuarios generados")
+        parser.add_argument("--sin-usuarios", action="store_true", help="Estudiantes sin usuario de login (más rápido)")
+
+    def handle(self, *args, **options):
+        try:
+            r = generar_datos(
+                cursos=options["cursos"], secciones_por_curso=options["secciones_por_curso"],
+                docentes=options["docentes"], estudiantes=options["estudiantes"],
+                notas_por_estudiante=options["notas_por_estudiante"], media=options["media"],
+                desviacion=options["desviacion"], ruido=options["ruido"], pendientes=options["pendientes"],
+                seed=options["seed"], prefijo=options["prefijo"], password=options["password"],
+                con_usuarios=not options["sin_usuarios"], progreso=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"OK: {r['cursos']} cursos, {r['secciones']} secciones, {r['docentes']} docentes, "
+            f"{r['estudiantes']} estudiantes y {r['notas']} notas en {r['segundos']} s "
+            f"({r['notas'] / max(r['segundos'], 1e-9):.0f} notas/s)."
+        ))
@@ -0,0 +1,29 @@
+# core/management/commands/importar_notas.py
+from django.core.management.base import BaseCommand, CommandError
+from core.importers import import_notas, IMPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = "Importa notas desde un CSV o XLSX con el layout de las exportaciones (Codigo, Estudiante, Curso, Seccion, Av1..Final)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del archivo .csv o .xlsx")
+        parser.add_argument("--formato", choices=IMPORT_FORMATS, help="Por defecto según la extensión")
+        parser.add_argument("--dry-run", action="store_true", help="Solo validar, sin escribir")
+
+    def handle(self, *args, **options):
+        path = options["archivo"]
+        formato = options["formato"] or path.rsplit(".", 1)[-1].lower()
+        try:
+            with open(path, "rb") as f:
+                report = import_notas(f, formato, dry_run=options["dry_run"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for err in report["errores"]:
+            self.stderr.write(f"Fila {err['fila']}: {err['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Filas: {report['filas']}. Válidas: {report['validas']}. Creadas: {report['creadas']}. "
+            f"Actualizadas: {report['actualizadas']}. Errores: {report['n_errores']}."
+            + (" (dry-run, sin escribir)" if options["dry_run"] else "")
+        ))
@@ -0,0 +1,67 @@
+# core/management/commands/procesar_trabajos.py
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.trabajos import tomar, ejecutar, recuperar_colgados, purgar_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de trabajos (exportaciones y ML de /api/trabajos/): los ejecuta de a uno "
+        "en orden de llegada y purga los vencidos. Se pueden correr varios en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Vacía la cola y termina")
+        parser.add_argument("--intervalo", type=float, default=None, help="Segundos de espera con la cola vacía "
+                                                                          "(por defecto JOBS_POLL_SECONDS)")
+        parser.add_argument("--max-trabajos", type=int, default=0, help="Termina tras N trabajos (0 = sin límite)")
+
+    def handle(self, *args, **options):
+        intervalo = options["intervalo"] or getattr(settings, "JOBS_POLL_SECONDS", 2.0)
+        purga_cada = getattr(settings, "JOBS_PURGE_SECONDS", 300)
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.detener = False
+
+        def al_detener(signum, frame):  # termina el trabajo actual y sale
+            self.detener = True
+        signal.signal(signal.SIGTERM, al_detener)
+        signal.signal(signal.SIGINT, al_detener)
+
+        self.stdout.write(f"Worker {worker} esperando trabajos.")
+        hechos, ultima_purga = 0, 0.0
+        while not self.detener:
+            close_old_connections()
+            if time.monotonic() - ultima_purga >= purga_cada:
+                colgados, vencidos = recuperar_colgados(), purgar_vencidos()
+                ultima_purga = time.monotonic()
+                if colgados or vencidos:
+                    self.stdout.write(f"Colgados cerrados: {colgados}. Vencidos purgados: {vencidos}.")
+
+            trabajo = tomar(worker)
+            if trabajo is None:
+                if options["una_vez"]:
+                    break
+                fin = time.monotonic() + intervalo
+                while not self.detener and time.monotonic() < fin:
+                    time.sleep(min(0.2, intervalo))
+                continue
+
+            t0 = time.perf_counter()
+            trabajo = ejecutar(trabajo)
+            hechos += 1
+            estilo = self.style.SUCCESS if trabajo.estado == trabajo.OK else self.style.ERROR
+            self.stdout.write(estilo(
+                f"{trabajo.tipo} {trabajo.pk}: {trabajo.estado} ({trabajo.status_code}) "
+                f"en {time.perf_counter() - t0:.2f}s"
+            ))
+            if options["max_trabajos"] and hechos >= options["max_trabajos"]:
+                break
+
+        self.stdout.write(f"Worker {worker}: {hechos} trabajos procesados.")
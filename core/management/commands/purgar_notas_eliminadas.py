@@ -0,0 +1,20 @@
+# core/management/commands/purgar_notas_eliminadas.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import NotaEliminada
+
+
+class Command(BaseCommand):
+    help = "Borra los registros de notas eliminadas más antiguos que SYNC_TOMBSTONE_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=None, help="Por defecto SYNC_TOMBSTONE_DAYS")
+
+    def handle(self, *args, **options):
+        dias = options["dias"] if options["dias"] is not None else getattr(settings, "SYNC_TOMBSTONE_DAYS", 30)
+        borradas, _ = NotaEliminada.objects.filter(eliminado__lt=timezone.now() - timedelta(days=dias)).delete()
+        self.stdout.write(self.style.SUCCESS(f"Registros purgados: {borradas}."))
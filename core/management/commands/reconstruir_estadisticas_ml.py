@@ -0,0 +1,16 @@
+# core/management/commands/reconstruir_estadisticas_ml.py
+from django.core.management.base import BaseCommand
+from core.ml import rebuild_regression_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye con un escaneo completo los estadísticos de la regresión incremental "
+        "(medianas de imputación y XᵀX/Xᵀy). Ejecutar periódicamente para corregir la deriva."
+    )
+
+    def handle(self, *args, **options):
+        stats = rebuild_regression_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticos reconstruidos: n={stats.n}, revisión {stats.revision}."
+        ))
@@ -0,0 +1,322 @@
+# core/metrics.py
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+ROWS_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Store:
+    """
+    Valores de este proceso. Con METRICS_DIR cada proceso vuelca los suyos (a lo sumo cada
+    METRICS_FLUSH_SECONDS, con reemplazo atómico) a su propio archivo JSON, y la exposición
+    suma los archivos de todos los workers. Tras un fork el hijo arranca de cero con otro archivo.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.counters: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple[str, ...]], List] = {}  # [conteos por bucket (+Inf al final), suma]
+        self.archivo = None
+        self.ultimo_flush = 0.0
+
+    def _check_fork(self):
+        if os.getpid() != self.pid:
+            self._reset()
+
+    def inc(self, name, labels, amount):
+        with self.lock:
+            self._check_fork()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, labels, buckets, value):
+        with self.lock:
+            self._check_fork()
+            h = self.histograms.setdefault((name, labels), [[0] * (len(buckets) + 1), 0.0])
+            i = next((i for i, b in enumerate(buckets) if value <= b), len(buckets))
+            h[0][i] += 1
+            h[1] += value
+        self._maybe_flush()
+
+    def _dir(self) -> Optional[str]:
+        d = getattr(settings, "METRICS_DIR", None)
+        return str(d) if d else None
+
+    def _maybe_flush(self):
+        if time.monotonic() - self.ultimo_flush >= float(getattr(settings, "METRICS_FLUSH_SECONDS", 1.0)):
+            self.flush()
+
+    def flush(self):
+        d = self._dir()
+        if not d:
+            return
+        with self.lock:
+            self._check_fork()
+            self.ultimo_flush = time.monotonic()
+            if not self.counters and not self.histograms:
+                return
+            if self.archivo is None:
+                os.makedirs(d, exist_ok=True)
+                self.archivo = os.path.join(d, f"{self.pid}-{uuid.uuid4().hex[:8]}.json")
+            data = {
+                "c": [[n, list(lv), v] for (n, lv), v in self.counters.items()],
+                "h": [[n, list(lv), h[0], h[1]] for (n, lv), h in self.histograms.items()],
+            }
+            # con el lock tomado: dos hilos no comparten el .tmp ni reemplazan en desorden
+            tmp = f"{self.archivo}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.archivo)
+
+    def snapshot(self):
+        """Suma de todos los procesos (o solo este si no hay METRICS_DIR)."""
+        d = self._dir()
+        if not d:
+            with self.lock:
+                self._check_fork()
+                return dict(self.counters), {k: [list(h[0]), h[1]] for k, h in self.histograms.items()}
+        self.flush()
+        counters, histograms = {}, {}
+        for path in glob.glob(os.path.join(d, "*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for n, lv, v in data.get("c", []):
+                key = (n, tuple(lv))
+                counters[key] = counters.get(key, 0.0) + v
+            for n, lv, conteos, suma in data.get("h", []):
+                h = histograms.setdefault((n, tuple(lv)), [[0] * len(conteos), 0.0])
+                if len(h[0]) != len(conteos):  # buckets cambiados entre versiones: se descarta
+                    continue
+                h[0] = [a + b for a, b in zip(h[0], conteos)]
+                h[1] += suma
+        return counters, histograms
+
+
+_STORE = _Store()
+_METRICS: Dict[str, "_Metric"] = {}
+
+
+class _Metric:
+    tipo = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _METRICS[name] = self
+
+    def _labels(self, labels) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    tipo = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        _STORE.inc(self.name, self._labels(labels), amount)
+
+
+class Histogram(_Metric):
+    tipo = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        _STORE.observe(self.name, self._labels(labels), self.buckets, value)
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+
+# =========================
+# MÉTRICAS DE LA APP
+# =========================
+HTTP_REQUESTS = Counter(
+    "gradebase_http_requests_total", "Requests atendidos por acción de DRF.",
+    ("view", "action", "method", "status"),
+)
+HTTP_DURATION = Histogram(
+    "gradebase_http_request_duration_seconds", "Duración de la acción de DRF (sin el render ni el streaming).",
+    ("view", "action", "method"),
+)
+ML_TRAINING_DURATION = Histogram(
+    "gradebase_ml_training_duration_seconds", "Duración de cada entrenamiento de modelo.", ("modelo",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+ML_TRAINING_ROWS = Histogram(
+    "gradebase_ml_training_rows", "Filas de entrenamiento por modelo entrenado.", ("modelo",), buckets=ROWS_BUCKETS,
+)
+EXPORT_DURATION = Histogram(
+    "gradebase_export_duration_seconds", "Duración de cada exportación, incluido el streaming.", ("formato",),
+)
+EXPORT_BYTES = Histogram(
+    "gradebase_export_bytes", "Tamaño de cada exportación.", ("formato",), buckets=SIZE_BUCKETS,
+)
+JWT_TOKENS = Counter(
+    "gradebase_jwt_tokens_total", "Emisión de tokens JWT por tipo y resultado.", ("tipo", "resultado"),
+)
+JWT_DURATION = Histogram(
+    "gradebase_jwt_issue_duration_seconds", "Duración de la emisión de tokens (incluye verificar la contraseña).",
+    ("tipo",),
+)
+JOBS = Counter(
+    "gradebase_jobs_total", "Trabajos en segundo plano terminados por tipo y estado (ok/error).", ("tipo", "estado"),
+)
+JOB_DURATION = Histogram(
+    "gradebase_job_duration_seconds", "Duración de cada trabajo en segundo plano en el worker.", ("tipo",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0),
+)
+
+
+def descartar():
+    """Olvida los valores de este proceso sin volcarlos (tests y benchmark, con un METRICS_DIR temporal)."""
+    with _STORE.lock:
+        _STORE._reset()
+
+
+def observe_export(formato: str, response, t0: float):
+    """Registra tamaño y duración de una exportación; en streaming, al terminar de enviarse."""
+    if not response.streaming:
+        EXPORT_DURATION.observe(time.perf_counter() - t0, formato=formato)
+        EXPORT_BYTES.observe(len(response.content), formato=formato)
+        return response
+
+    def medido(chunks):
+        total = 0
+        try:
+            for chunk in chunks:
+                total += len(chunk)
+                yield chunk
+        finally:
+            EXPORT_DURATION.observe(time.perf_counter() - t0, formato=formato)
+            EXPORT_BYTES.observe(total, formato=formato)
+
+    response.streaming_content = medido(response.streaming_content)
+    return response
+
+
+def medir_exportacion(formato: str):
+    """Decorador para las acciones de exportación: tamaño y duración de las respuestas 200."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(self, request, *args, **kwargs):
+            t0 = time.perf_counter()
+            response = fn(self, request, *args, **kwargs)
+            return observe_export(formato, response, t0) if response.status_code == 200 else response
+        return wrapper
+    return deco
+
+
+class InstrumentedViewMixin:
+    """Para los viewsets: cuenta requests y mide la duración por acción."""
+
+    def dispatch(self, request, *args, **kwargs):
+        t0 = time.perf_counter()
+        response = super().dispatch(request, *args, **kwargs)
+        view, action, method = self.__class__.__name__, getattr(self, "action", None) or "-", request.method
+        HTTP_DURATION.observe(time.perf_counter() - t0, view=view, action=action, method=method)
+        HTTP_REQUESTS.inc(view=view, action=action, method=method, status=response.status_code)
+        return response
+
+
+# =========================
+# EXPOSICIÓN
+# =========================
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pares.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _fmt_num(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf"
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def render_text() -> str:
+    """Todas las métricas registradas en formato de texto de Prometheus (0.0.4)."""
+    counters, histograms = _STORE.snapshot()
+    out = []
+    for name, m in sorted(_METRICS.items()):
+        out.append(f"# HELP {name} {m.documentation}")
+        out.append(f"# TYPE {name} {m.tipo}")
+        if isinstance(m, Counter):
+            for (n, lv), v in sorted(counters.items()):
+                if n == name:
+                    out.append(f"{name}{_fmt_labels(m.labelnames, lv)} {_fmt_num(v)}")
+        else:
+            for (n, lv), (conteos, suma) in sorted(histograms.items()):
+                if n != name or len(conteos) != len(m.buckets) + 1:
+                    continue
+                acumulado = 0
+                for le, c in zip((*m.buckets, math.inf), conteos):
+                    acumulado += c
+                    out.append(f"{name}_bucket{_fmt_labels(m.labelnames, lv, ('le', _fmt_num(le)))} {acumulado}")
+                out.append(f"{name}_sum{_fmt_labels(m.labelnames, lv)} {_fmt_num(suma)}")
+                out.append(f"{name}_count{_fmt_labels(m.labelnames, lv)} {acumulado}")
+    return "\n".join(out) + "\n"
+
+
+def _es_admin(request) -> bool:
+    """Usuario staff por sesión (admin de Django) o por el JWT de la API."""
+    from rest_framework.exceptions import AuthenticationFailed
+    from .authentication import RolesJWTAuthentication
+
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        auth = RolesJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(auth and auth[0].is_staff)
+
+
+def metrics_view(request):
+    """
+    GET /api/metrics/: con 'Authorization: Bearer <METRICS_TOKEN>' (el scraper) o como
+    usuario admin. Sin METRICS_TOKEN definido solo pueden verlas los admin.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    con_token = token and constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}")
+    if not con_token and not _es_admin(request):
+        return HttpResponseForbidden("Se requiere el token de métricas o un usuario admin.")
+    return HttpResponse(render_text(), content_type=CONTENT_TYPE)
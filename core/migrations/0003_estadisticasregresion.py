@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_nota_options_alter_seccion_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasRegresion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('n', models.PositiveIntegerField(default=0)),
+                ('xtx', models.JSONField(default=list)),
+                ('xty', models.JSONField(default=list)),
+                ('yty', models.FloatField(default=0.0)),
+                ('medianas', models.JSONField(default=list)),
+                ('revision', models.PositiveIntegerField(default=0)),
+                ('reconstruido', models.DateTimeField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de regresión',
+                'verbose_name_plural': 'Estadísticas de regresión',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_estadisticasregresion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrediccionNota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pred_nota_final', models.FloatField(blank=True, null=True)),
+                ('prob_desaprobacion', models.FloatField(blank=True, null=True)),
+                ('riesgo', models.CharField(blank=True, max_length=5)),
+                ('version_proyeccion', models.CharField(blank=True, max_length=40)),
+                ('version_riesgo', models.CharField(blank=True, max_length=40)),
+                ('calculado_en', models.DateTimeField(auto_now=True)),
+                ('nota', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='prediccion', to='core.nota')),
+                ('seccion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predicciones', to='core.seccion')),
+            ],
+            options={
+                'verbose_name': 'Predicción',
+                'verbose_name_plural': 'Predicciones',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_prediccionnota'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['seccion', '-actualizado'], name='nota_seccion_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['-actualizado', '-id'], name='nota_actualizado_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(condition=models.Q(('nota_final__isnull', False)), fields=['nota_final', 'avance1', 'avance2', 'avance3', 'participacion', 'proyecto_final'], name='nota_ml_train_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_nota_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seccion',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_seccion_actualizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotaEliminada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nota_id', models.BigIntegerField()),
+                ('estudiante_id', models.BigIntegerField()),
+                ('seccion_id', models.BigIntegerField()),
+                ('eliminado', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Nota eliminada',
+                'verbose_name_plural': 'Notas eliminadas',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:56
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_notaeliminada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=20)),
+                ('parametros', models.JSONField(default=dict)),
+                ('clave', models.CharField(max_length=64)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('ok', 'Terminado'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('expira', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('nombre_archivo', models.CharField(blank=True, max_length=200)),
+                ('archivo', models.CharField(blank=True, max_length=100)),
+                ('tamano', models.BigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'creado'], name='trabajo_estado_creado_idx'), models.Index(fields=['usuario', '-creado'], name='trabajo_usuario_creado_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('estado__in', ['pendiente', 'en_curso'])), fields=('clave',), name='trabajo_activo_unico')],
+            },
+        ),
+    ]
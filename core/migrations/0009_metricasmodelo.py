@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_trabajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricasModelo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=30)),
+                ('version', models.CharField(max_length=40)),
+                ('metricas', models.JSONField(default=dict)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Métricas de modelo',
+                'verbose_name_plural': 'Métricas de modelos',
+                'unique_together': {('tipo', 'version')},
+            },
+        ),
+    ]
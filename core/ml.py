@@ -1,21 +1,31 @@
 # core/ml.py
-from typing import List, Dict, Any, Tuple
+import os
+import threading
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+import joblib
 
-from django.db.models import QuerySet
-from core.models import Nota
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet, Count, Max, Q
+from django.utils import timezone
+from core.models import Nota, EstadisticasRegresion, PrediccionNota, MetricasModelo
+from core import metrics
 
 # scikit-learn
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.metrics import r2_score, mean_squared_error, accuracy_score
+from sklearn.metrics import r2_score, root_mean_squared_error, accuracy_score
 from sklearn.model_selection import train_test_split
 
 FEATURES = ["avance1", "avance2", "avance3", "participacion", "proyecto_final"]
 PASSING_GRADE = 11.0
 _MIN_TRAIN_ROWS = 10  # mínimo para entrenar
+_LOAD_CHUNK_ROWS = 5000  # filas por chunk al cargar columnas de entrenamiento
 
 
 def _fetch_training_qs() -> QuerySet:
@@ -24,26 +34,42 @@ def _fetch_training_qs() -> QuerySet:
     return qs
 
 
+def _load_columns(qs: QuerySet, chunk_size: int = _LOAD_CHUNK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Carga FEATURES + nota_final en columnas float64 (NULL -> NaN) sin instanciar
+    objetos Nota: values_list por chunks directo a arreglos preasignados.
+    """
+    qs = qs.order_by()
+    n = qs.count()
+    data = np.empty((n, len(FEATURES) + 1), dtype=np.float64)
+    filled = 0
+    rows = qs.values_list(*FEATURES, "nota_final").iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        block = np.array(chunk, dtype=np.float64)
+        if filled + len(block) > data.shape[0]:  # llegaron filas entre el COUNT y la lectura
+            data = np.resize(data, (filled + len(block), data.shape[1]))
+        data[filled:filled + len(block)] = block
+        filled += len(block)
+    data = data[:filled]
+    return data[:, :-1], data[:, -1]
+
+
 def _qs_to_xy_regression(qs: QuerySet) -> Tuple[np.ndarray, np.ndarray]:
-    X, y = [], []
-    for n in qs.select_related("estudiante", "seccion", "seccion__curso"):
-        row = [getattr(n, f) for f in FEATURES]
-        # Mantenemos NaN; el Imputer los resolverá
-        X.append(row)
-        y.append(n.nota_final)
-    return np.array(X, dtype=float), np.array(y, dtype=float)
+    # Mantenemos NaN en X; el Imputer los resolverá
+    return _load_columns(qs)
 
 
 def _qs_to_xy_logistic(qs: QuerySet) -> Tuple[np.ndarray, np.ndarray]:
-    X, y = [], []
-    for n in qs.select_related("estudiante", "seccion", "seccion__curso"):
-        row = [getattr(n, f) for f in FEATURES]
-        X.append(row)
-        y.append(1 if (n.nota_final is not None and n.nota_final < PASSING_GRADE) else 0)
-    return np.array(X, dtype=float), np.array(y, dtype=int)
+    X, final = _load_columns(qs)
+    return X, (final < PASSING_GRADE).astype(int)
 
 
 def train_linear_regression() -> Dict[str, Any]:
+    if incremental_linear_enabled():
+        return train_linear_regression_from_stats()
     qs = _fetch_training_qs()
     X, y = _qs_to_xy_regression(qs)
     if X.shape[0] < _MIN_TRAIN_ROWS:
@@ -59,13 +85,13 @@ def train_linear_regression() -> Dict[str, Any]:
         pipe.fit(Xtr, ytr)
         yhat = pipe.predict(Xte)
         r2 = r2_score(yte, yhat)
-        rmse = mean_squared_error(yte, yhat, squared=False)
+        rmse = root_mean_squared_error(yte, yhat)
         n_train = Xtr.shape[0]
     else:
         pipe.fit(X, y)
         yhat = pipe.predict(X)
         r2 = r2_score(y, yhat)
-        rmse = mean_squared_error(y, yhat, squared=False)
+        rmse = root_mean_squared_error(y, yhat)
         n_train = X.shape[0]
 
     return {"model": pipe, "r2": float(r2), "rmse": float(rmse), "n_train": int(n_train)}
@@ -98,76 +124,456 @@ def train_logistic_regression() -> Dict[str, Any]:
     return {"model": pipe, "accuracy": float(acc), "n_train": int(n_train)}
 
 
-def _pred_input_from_seccion(seccion) -> List[Dict[str, Any]]:
+# =========================
+# REGRESIÓN INCREMENTAL
+# =========================
+# Mínimos cuadrados se resuelve con XᵀX y Xᵀy, que se mantienen exactos con
+# sumas: cada alta/edición/baja de Nota resta su aporte anterior y suma el nuevo.
+# La imputación usa medianas congeladas en la última reconstrucción completa
+# (`reconstruir_estadisticas_ml`), que corrige también el error numérico acumulado.
+
+def incremental_linear_enabled() -> bool:
+    return getattr(settings, "ML_LINEAR_TRAINING", "full") == "incremental"
+
+
+def _augmented_rows(X: np.ndarray, medianas: np.ndarray) -> np.ndarray:
+    X = np.where(np.isnan(X), medianas, X)
+    return np.hstack([np.ones((X.shape[0], 1)), X])
+
+
+def rebuild_regression_stats() -> EstadisticasRegresion:
+    """Recalcula los estadísticos con un escaneo completo (y nuevas medianas)."""
+    X, y = _load_columns(_fetch_training_qs())
+    # columna sin datos -> 0.0 (np.nanmedian avisaría con RuntimeWarning)
+    medianas = np.array([np.median(c[~np.isnan(c)]) if (~np.isnan(c)).any() else 0.0 for c in X.T])
+    Xa = _augmented_rows(X, medianas)
+    with transaction.atomic():
+        stats = EstadisticasRegresion.objects.select_for_update().first() or EstadisticasRegresion()
+        stats.n = int(X.shape[0])
+        stats.xtx = (Xa.T @ Xa).tolist()
+        stats.xty = (Xa.T @ y).tolist()
+        stats.yty = float(y @ y)
+        stats.medianas = medianas.tolist()
+        stats.revision += 1
+        stats.reconstruido = timezone.now()
+        stats.save()
+    return stats
+
+
+def _regression_stats() -> EstadisticasRegresion:
+    return EstadisticasRegresion.objects.first() or rebuild_regression_stats()
+
+
+def apply_regression_delta(old_rows, new_rows) -> None:
     """
-    Regresa filas con features para todos los Nota de la sección dada.
+    Actualiza los estadísticos con filas (features..., nota_final) que salen (`old_rows`)
+    y entran (`new_rows`). Las filas sin nota_final no cuentan para el entrenamiento.
     """
-    notas = Nota.objects.filter(seccion=seccion).select_related("estudiante", "seccion", "seccion__curso")
+    def _valid(rows):
+        arr = np.array([r for r in rows if r is not None], dtype=np.float64).reshape(-1, len(FEATURES) + 1)
+        return arr[~np.isnan(arr[:, -1])]
+
+    old, new = _valid(old_rows), _valid(new_rows)
+    if not len(old) and not len(new):
+        return
+    with transaction.atomic():
+        stats = EstadisticasRegresion.objects.select_for_update().first()
+        if stats is None:
+            return  # se construye completo la próxima vez que se entrene
+        medianas = np.array(stats.medianas, dtype=np.float64)
+        xtx, xty = np.array(stats.xtx), np.array(stats.xty)
+        yty = stats.yty
+        for arr, sign in ((old, -1.0), (new, 1.0)):
+            Xa, y = _augmented_rows(arr[:, :-1], medianas), arr[:, -1]
+            xtx += sign * (Xa.T @ Xa)
+            xty += sign * (Xa.T @ y)
+            yty += sign * float(y @ y)
+        stats.n = stats.n - len(old) + len(new)
+        stats.xtx, stats.xty, stats.yty = xtx.tolist(), xty.tolist(), yty
+        stats.revision += 1
+        stats.save(update_fields=["n", "xtx", "xty", "yty", "revision", "actualizado"])
+
+
+def train_linear_regression_from_stats(stats: Optional[EstadisticasRegresion] = None) -> Dict[str, Any]:
+    """Ajusta la regresión en O(features²) a partir de los estadísticos guardados."""
+    stats = stats or _regression_stats()
+    if stats.n < _MIN_TRAIN_ROWS:
+        raise ValueError(f"Datos insuficientes para entrenar regresión (mínimo {_MIN_TRAIN_ROWS}).")
+
+    xtx, xty = np.array(stats.xtx), np.array(stats.xty)
+    beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+
+    imp = SimpleImputer(strategy="median").fit(np.array([stats.medianas], dtype=np.float64))
+    lr = LinearRegression()
+    lr.coef_, lr.intercept_, lr.n_features_in_ = beta[1:], float(beta[0]), len(FEATURES)
+    pipe = Pipeline([("imp", imp), ("lr", lr)])
+
+    # métricas in-sample: SSE = yᵀy - 2βᵀXᵀy + βᵀXᵀXβ ; SST = yᵀy - n·ȳ²
+    n = stats.n
+    sse = max(stats.yty - 2 * beta @ xty + beta @ xtx @ beta, 0.0)
+    sst = stats.yty - xty[0] ** 2 / n
+    r2 = 1.0 - sse / sst if sst > 0 else 0.0
+    return {"model": pipe, "r2": float(r2), "rmse": float(np.sqrt(sse / n)), "n_train": int(n)}
+
+
+# =========================
+# REGISTRO DE MODELOS
+# =========================
+# Los pipelines entrenados se guardan con joblib en ML_MODEL_DIR junto con el
+# estado de los datos con que se entrenaron. Cada worker los carga una sola vez
+# y solo se reentrena cuando las Notas con nota_final cambiaron lo suficiente
+# (filas nuevas, editadas o eliminadas >= ML_RETRAIN_MIN_CHANGE del total).
+# Los cambios se detectan por Count y por `actualizado`: un QuerySet.update() que no
+# lo actualiza no se ve hasta el próximo reentrenamiento (entrenar_modelos --force).
+
+_TRAINERS = {
+    "linear_regression": train_linear_regression,
+    "logistic_regression": train_logistic_regression,
+}
+_REGISTRY: Dict[str, Dict[str, Any]] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _model_dir() -> str:
+    return str(getattr(settings, "ML_MODEL_DIR", settings.BASE_DIR / "ml_models"))
+
+
+def _model_path(kind: str) -> str:
+    return os.path.join(_model_dir(), f"{kind}.joblib")
+
+
+def _training_state(since=None) -> Dict[str, Any]:
+    """
+    Estado actual de los datos de entrenamiento en una sola consulta:
+    filas con nota_final, último 'actualizado' y filas modificadas desde `since`.
+    """
+    agg = {"n_rows": Count("id"), "max_actualizado": Max("actualizado")}
+    if since is not None:
+        agg["changed"] = Count("id", filter=Q(actualizado__gt=since))
+    state = _fetch_training_qs().order_by().aggregate(**agg)
+    state.setdefault("changed", state["n_rows"])
+    return state
+
+
+def _data_version(state: Dict[str, Any]) -> str:
+    ts = state["max_actualizado"]
+    return f"{state['n_rows']}-{int(ts.timestamp()) if ts else 0}"
+
+
+def _is_stale(meta: Dict[str, Any], state: Dict[str, Any]) -> bool:
+    if meta["version"] == _data_version(state):
+        return False
+    min_change = float(getattr(settings, "ML_RETRAIN_MIN_CHANGE", 0.05))
+    drift = state["changed"] + abs(state["n_rows"] - meta["n_rows"])
+    return drift >= max(1.0, min_change * meta["n_rows"])
+
+
+def _load_from_disk(kind: str) -> Optional[Dict[str, Any]]:
+    try:
+        return joblib.load(_model_path(kind))
+    except (FileNotFoundError, EOFError):
+        return None
+
+
+def _save_to_disk(kind: str, entry: Dict[str, Any]) -> None:
+    os.makedirs(_model_dir(), exist_ok=True)
+    path = _model_path(kind)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(entry, tmp)
+    os.replace(tmp, path)  # escritura atómica: otros workers nunca leen un archivo a medias
+
+
+def _train_entry(kind: str) -> Dict[str, Any]:
+    state = _training_state()
+    with metrics.ML_TRAINING_DURATION.time(modelo=kind):
+        bundle = _TRAINERS[kind]()
+    metrics.ML_TRAINING_ROWS.observe(state["n_rows"], modelo=kind)
+    return {
+        "bundle": bundle,
+        "meta": {
+            "version": _data_version(state),
+            "n_rows": state["n_rows"],
+            "max_actualizado": state["max_actualizado"],
+            "trained_at": timezone.now(),
+        },
+    }
+
+
+def get_model(kind: str, force_retrain: bool = False) -> Dict[str, Any]:
+    """
+    Devuelve el bundle entrenado de `kind` ("linear_regression" / "logistic_regression")
+    con la clave extra "version". Solo entrena si no hay modelo o si está desactualizado.
+    """
+    if kind not in _TRAINERS:
+        raise ValueError(f"Modelo desconocido: {kind}")
+    check_every = float(getattr(settings, "ML_REGISTRY_CHECK_SECONDS", 30))
+
+    with _REGISTRY_LOCK:
+        entry = _REGISTRY.get(kind)
+        now = time.monotonic()
+        if not force_retrain and entry and now - entry["checked"] < check_every:
+            return {**entry["bundle"], "version": entry["meta"]["version"]}
+
+        if kind == "linear_regression" and incremental_linear_enabled():
+            # reajustar es O(features²): basta con comparar la revisión de los estadísticos
+            stats = _regression_stats()
+            version = f"inc-{stats.revision}"
+            if force_retrain or not entry or entry["meta"]["version"] != version:
+                entry = {"bundle": train_linear_regression_from_stats(stats),
+                         "meta": {"version": version, "n_rows": stats.n, "trained_at": timezone.now()}}
+            entry = {**entry, "checked": now}
+            _REGISTRY[kind] = entry
+            return {**entry["bundle"], "version": version}
+
+        # primero el modelo en memoria; si quedó viejo, el del disco (otro worker pudo reentrenar)
+        candidates = () if force_retrain else (entry, lambda: _load_from_disk(kind))
+        for cand in candidates:
+            cand = cand() if callable(cand) else cand
+            if not cand:
+                continue
+            state = _training_state(since=cand["meta"]["max_actualizado"])
+            if not _is_stale(cand["meta"], state):
+                break
+        else:
+            cand = _train_entry(kind)
+            _save_to_disk(kind, cand)
+
+        entry = {"bundle": cand["bundle"], "meta": cand["meta"], "checked": now}
+        _REGISTRY[kind] = entry
+        return {**entry["bundle"], "version": entry["meta"]["version"]}
+
+
+_PRED_COLUMNS = ["pk", "seccion_id", "estudiante__codigo", "estudiante__nombre", "estudiante__apellido",
+                 "seccion__curso__codigo", "seccion__nombre"]
+
+
+def _pred_input(qs: QuerySet) -> List[Dict[str, Any]]:
     rows = []
-    for n in notas:
+    for pk, seccion_id, codigo, nombre, apellido, curso, seccion, *features in (
+        qs.values_list(*_PRED_COLUMNS, *FEATURES)
+    ):
         rows.append({
-            "pk": n.pk,
-            "codigo": n.estudiante.codigo,
-            "nombre": f"{n.estudiante.nombre} {n.estudiante.apellido}",
-            "curso": n.seccion.curso.codigo,
-            "seccion": n.seccion.nombre,
-            "features": [getattr(n, f) for f in FEATURES],
+            "pk": pk,
+            "seccion_id": seccion_id,
+            "codigo": codigo,
+            "nombre": f"{nombre} {apellido}",
+            "curso": curso,
+            "seccion": seccion,
+            "features": features,
         })
     return rows
 
 
-def predict_final_for_seccion(seccion) -> Dict[str, Any]:
-    bundle = train_linear_regression()
-    model = bundle["model"]
+def _pred_input_from_seccion(seccion) -> List[Dict[str, Any]]:
+    """
+    Regresa filas con features para todos los Nota de la sección dada.
+    """
+    return _pred_input(Nota.objects.filter(seccion=seccion))
 
-    rows = _pred_input_from_seccion(seccion)
-    if not rows:
-        raise ValueError("No hay notas en la sección seleccionada.")
 
-    X = np.array([r["features"] for r in rows], dtype=float)
-    yhat = model.predict(X)
-    # limitar a 0..20
-    yhat = np.clip(yhat, 0.0, 20.0)
+def _risk_tier(p: float) -> str:
+    return "ALTO" if p >= 0.6 else ("MEDIO" if p >= 0.3 else "BAJO")
 
-    preds = []
-    for r, p in zip(rows, yhat):
-        preds.append({
-            "codigo": r["codigo"],
-            "estudiante": r["nombre"],
-            "curso": r["curso"],
-            "seccion": r["seccion"],
-            "pred_nota_final": round(float(p), 2),
-        })
 
-    return {
-        "metrics": {"r2": bundle["r2"], "rmse": bundle["rmse"], "n_train": bundle["n_train"]},
-        "predictions": preds
-    }
+def _predict_rows(kind: str, model, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Predicción vectorizada para todas las filas de una vez."""
+    X = np.array([r["features"] for r in rows], dtype=float).reshape(-1, len(FEATURES))
+    base = [{"codigo": r["codigo"], "estudiante": r["nombre"], "curso": r["curso"], "seccion": r["seccion"]}
+            for r in rows]
+    if kind == "linear_regression":
+        yhat = np.clip(model.predict(X), 0.0, 20.0)  # limitar a 0..20
+        return [{**b, "pred_nota_final": round(float(p), 2)} for b, p in zip(base, yhat)]
+    proba = model.predict_proba(X)[:, 1]  # prob de desaprobar (<11)
+    return [{**b, "prob_desaprobacion": round(float(p), 3), "riesgo": _risk_tier(p)} for b, p in zip(base, proba)]
 
 
-def predict_risk_for_seccion(seccion) -> Dict[str, Any]:
-    bundle = train_logistic_regression()
-    model = bundle["model"]
+def _metrics(kind: str, bundle: Dict[str, Any]) -> Dict[str, Any]:
+    keys = ["r2", "rmse"] if kind == "linear_regression" else ["accuracy"]
+    return {**{k: bundle[k] for k in keys}, "n_train": bundle["n_train"], "version": bundle["version"]}
 
+
+def _predict_for_seccion(kind: str, seccion) -> Dict[str, Any]:
+    bundle = get_model(kind)
     rows = _pred_input_from_seccion(seccion)
     if not rows:
         raise ValueError("No hay notas en la sección seleccionada.")
+    preds = _predict_rows(kind, bundle["model"], rows)
+    metricas = _metrics(kind, bundle)
+    store_predictions(kind, {seccion.pk: [{**p, "pk": r["pk"]} for r, p in zip(rows, preds)]}, metricas)
+    return {"metrics": metricas, "predictions": preds}
 
-    X = np.array([r["features"] for r in rows], dtype=float)
-    proba = model.predict_proba(X)[:, 1]  # prob de desaprobar (<11)
+
+def predict_final_for_seccion(seccion) -> Dict[str, Any]:
+    return _predict_for_seccion("linear_regression", seccion)
+
+
+def predict_risk_for_seccion(seccion) -> Dict[str, Any]:
+    return _predict_for_seccion("logistic_regression", seccion)
+
+
+# =========================
+# PREDICCIONES MATERIALIZADAS
+# =========================
+# Columna de valor y de versión en PrediccionNota para cada tipo de modelo.
+_MATERIALIZED = {
+    "linear_regression": ("pred_nota_final", "version_proyeccion"),
+    "logistic_regression": ("prob_desaprobacion", "version_riesgo"),
+}
+_STORE_BATCH = 1000
+
+
+def store_predictions(kind: str, por_seccion: Dict[int, List[Dict[str, Any]]], metricas: Dict[str, Any]) -> None:
+    """
+    Upsert de predicciones (dicts con 'pk' de la Nota) en PrediccionNota, y de las métricas
+    del modelo (_metrics, con "version") en MetricasModelo.
+    """
+    version = metricas["version"]
+    value_field, version_field = _MATERIALIZED[kind]
+    update_fields = [value_field, version_field, "seccion", "calculado_en"]
+    if kind == "logistic_regression":
+        update_fields.append("riesgo")
+    objs = [
+        PrediccionNota(nota_id=p["pk"], seccion_id=sid, riesgo=p.get("riesgo", ""),
+                       **{value_field: p[value_field], version_field: version})
+        for sid, preds in por_seccion.items() for p in preds
+    ]
+    with transaction.atomic():
+        MetricasModelo.objects.bulk_create(  # upsert en una sola consulta
+            [MetricasModelo(tipo=kind, version=version, metricas=metricas)],
+            update_conflicts=True, unique_fields=["tipo", "version"], update_fields=["metricas", "actualizado"],
+        )
+        for i in range(0, len(objs), _STORE_BATCH):
+            batch = objs[i:i + _STORE_BATCH]
+            # una Nota pudo borrarse mientras se puntuaba
+            vivas = set(Nota.objects.filter(pk__in=[o.nota_id for o in batch]).values_list("pk", flat=True))
+            PrediccionNota.objects.bulk_create(
+                [o for o in batch if o.nota_id in vivas],
+                update_conflicts=True, unique_fields=["nota"], update_fields=update_fields,
+            )
+
+
+def invalidate_predictions(seccion_ids) -> None:
+    PrediccionNota.objects.filter(seccion_id__in=list(seccion_ids)).delete()
+
+
+def materialized_predictions(kind: str, seccion) -> Optional[Dict[str, Any]]:
+    """
+    Predicciones guardadas de la sección en una sola consulta (Nota LEFT JOIN PrediccionNota).
+    None si falta alguna fila o hay versiones mezcladas: el llamador calcula en vivo.
+    """
+    value_field, version_field = _MATERIALIZED[kind]
+    rows = list(
+        Nota.objects.filter(seccion=seccion).values_list(
+            "estudiante__codigo", "estudiante__nombre", "estudiante__apellido",
+            f"prediccion__{value_field}", f"prediccion__{version_field}",
+            "prediccion__riesgo", "prediccion__calculado_en",
+        )
+    )
+    if not rows or any(r[3] is None for r in rows) or len({r[4] for r in rows}) != 1:
+        return None
+
+    version = rows[0][4]
     preds = []
-    for r, p in zip(rows, proba):
-        riesgo_txt = "ALTO" if p >= 0.6 else ("MEDIO" if p >= 0.3 else "BAJO")
-        preds.append({
-            "codigo": r["codigo"],
-            "estudiante": r["nombre"],
-            "curso": r["curso"],
-            "seccion": r["seccion"],
-            "prob_desaprobacion": round(float(p), 3),
-            "riesgo": riesgo_txt
-        })
+    for codigo, nombre, apellido, value, _, riesgo, _ in rows:
+        p = {"codigo": codigo, "estudiante": f"{nombre} {apellido}",
+             "curso": seccion.curso.codigo, "seccion": seccion.nombre, value_field: value}
+        if kind == "logistic_regression":
+            p["riesgo"] = riesgo
+        preds.append(p)
+
+    # métricas del modelo cargado si es esa versión; si no (worker nuevo o reentrenado), las guardadas
+    entry = _REGISTRY.get(kind)
+    if entry and entry["meta"]["version"] == version:
+        metricas = _metrics(kind, {**entry["bundle"], "version": version})
+    else:
+        metricas = (MetricasModelo.objects.filter(tipo=kind, version=version)
+                    .values_list("metricas", flat=True).first())
+        if metricas is None:  # predicciones sin métricas guardadas: se calcula en vivo
+            return None
+        metricas = dict(metricas)
+    metricas.update(materializado=True, calculado_en=max(r[6] for r in rows))
+    return {"metrics": metricas, "predictions": preds}
+
+
+# =========================
+# SCORING POR LOTES
+# =========================
+# Entrena (o carga) el modelo una vez, agrupa secciones en lotes de ~batch_rows
+# filas y los puntúa en un pool de procesos; cada worker recibe el modelo una
+# sola vez en su initializer y lee de la BD solo las filas de su lote.
+
+_POOL_MODELS: Dict[str, Any] = {}
+
+
+def _pool_init(kind: str, model) -> None:
+    import django
+    from django.db import connections
+    django.setup()
+    connections.close_all()  # no reutilizar la conexión heredada del proceso padre
+    _POOL_MODELS[kind] = model
+
+
+def _score_batch(kind: str, seccion_ids: List[int], model=None) -> Dict[int, List[Dict[str, Any]]]:
+    model = model if model is not None else _POOL_MODELS[kind]
+    rows = _pred_input(Nota.objects.filter(seccion_id__in=seccion_ids).order_by("seccion_id", "-actualizado"))
+    out: Dict[int, List[Dict[str, Any]]] = {sid: [] for sid in seccion_ids}
+    for r, pred in zip(rows, _predict_rows(kind, model, rows)):
+        out[r["seccion_id"]].append({**pred, "pk": r["pk"]})
+    return out
+
+
+def _plan_batches(seccion_ids: List[int], batch_rows: int) -> Tuple[List[List[int]], int]:
+    counts = dict(
+        Nota.objects.filter(seccion_id__in=seccion_ids).order_by()
+        .values_list("seccion_id").annotate(n=Count("id"))
+    )
+    batches, current, size = [], [], 0
+    for sid in seccion_ids:
+        n = counts.get(sid, 0)
+        if not n:
+            continue
+        if current and size + n > batch_rows:
+            batches.append(current)
+            current, size = [], 0
+        current.append(sid)
+        size += n
+    if current:
+        batches.append(current)
+    return batches, sum(counts.values())
+
+
+def score_secciones(kind: str, seccion_ids: List[int], workers: int = 1,
+                    batch_rows: int = 5000, store: bool = True) -> Dict[str, Any]:
+    """
+    Puntúa todas las secciones indicadas con un único modelo y (por defecto) guarda
+    el resultado en PrediccionNota.
+    Devuelve métricas del modelo, predicciones por sección (con 'pk' de la Nota),
+    filas puntuadas y segundos de scoring (sin contar el entrenamiento).
+    """
+    bundle = get_model(kind)
+    batches, n_rows = _plan_batches(list(seccion_ids), batch_rows)
+
+    t0 = time.perf_counter()
+    por_seccion: Dict[int, List[Dict[str, Any]]] = {}
+    if workers <= 1 or len(batches) <= 1:
+        for batch in batches:
+            por_seccion.update(_score_batch(kind, batch, bundle["model"]))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from django.db import connections
+        connections.close_all()  # los hijos abren sus propias conexiones
+        with ProcessPoolExecutor(max_workers=workers, initializer=_pool_init,
+                                 initargs=(kind, bundle["model"])) as pool:
+            for result in pool.map(_score_batch, [kind] * len(batches), batches):
+                por_seccion.update(result)
+    metricas = _metrics(kind, bundle)
+    if store:
+        store_predictions(kind, por_seccion, metricas)
+    elapsed = time.perf_counter() - t0
 
     return {
-        "metrics": {"accuracy": bundle["accuracy"], "n_train": bundle["n_train"]},
-        "predictions": preds
+        "metrics": metricas,
+        "por_seccion": por_seccion,
+        "n_rows": n_rows,
+        "elapsed": elapsed,
     }
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -36,6 +38,7 @@ class Seccion(models.Model):
     profesor = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="secciones_dictadas"
     )
+    actualizado = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("curso", "nombre")
@@ -64,6 +67,151 @@ class Nota(models.Model):
     class Meta:
         unique_together = ("estudiante", "seccion")  # una fila por alumno x sección
         ordering = ["-actualizado"]
+        indexes = [
+            # listado del docente / export por sección, ya ordenado por -actualizado
+            models.Index(fields=["seccion", "-actualizado"], name="nota_seccion_actualizado_idx"),
+            # listado global, paginación por cursor (actualizado, id) y sync por fecha
+            models.Index(fields=["-actualizado", "-id"], name="nota_actualizado_id_idx"),
+            # entrenamiento ML: índice parcial y cubriente (solo filas con nota_final)
+            models.Index(
+                fields=["nota_final", "avance1", "avance2", "avance3", "participacion", "proyecto_final"],
+                condition=models.Q(nota_final__isnull=False),
+                name="nota_ml_train_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.estudiante.codigo} - {self.seccion}"
+
+
+class EstadisticasRegresion(models.Model):
+    """
+    Estadísticos suficientes de la regresión de proyección (una sola fila).
+    Las matrices incluyen el intercepto en la posición 0.
+    """
+    n = models.PositiveIntegerField(default=0)
+    xtx = models.JSONField(default=list)  # XᵀX (con columna de unos)
+    xty = models.JSONField(default=list)  # Xᵀy
+    yty = models.FloatField(default=0.0)  # yᵀy
+    medianas = models.JSONField(default=list)  # imputación fija desde la última reconstrucción
+    revision = models.PositiveIntegerField(default=0)
+    reconstruido = models.DateTimeField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estadísticas de regresión"
+        verbose_name_plural = "Estadísticas de regresión"
+
+    def __str__(self):
+        return f"Regresión n={self.n} (rev {self.revision})"
+
+
+class PrediccionNota(models.Model):
+    """
+    Predicciones materializadas por Nota (scoring por lotes o último cálculo en vivo).
+    Se borran las de una sección cuando cambian sus notas.
+    """
+    nota = models.OneToOneField(Nota, on_delete=models.CASCADE, related_name="prediccion")
+    seccion = models.ForeignKey(Seccion, on_delete=models.CASCADE, related_name="predicciones")
+
+    pred_nota_final = models.FloatField(null=True, blank=True)
+    prob_desaprobacion = models.FloatField(null=True, blank=True)
+    riesgo = models.CharField(max_length=5, blank=True)
+    version_proyeccion = models.CharField(max_length=40, blank=True)
+    version_riesgo = models.CharField(max_length=40, blank=True)
+
+    calculado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Predicción"
+        verbose_name_plural = "Predicciones"
+
+    def __str__(self):
+        return f"Predicción {self.nota_id}"
+
+
+class MetricasModelo(models.Model):
+    """
+    Métricas (r2/rmse o accuracy, n_train) de cada versión de modelo con predicciones en
+    PrediccionNota: las respuestas materializadas las devuelven sin cargar el modelo.
+    """
+    tipo = models.CharField(max_length=30)
+    version = models.CharField(max_length=40)
+    metricas = models.JSONField(default=dict)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("tipo", "version")
+        verbose_name = "Métricas de modelo"
+        verbose_name_plural = "Métricas de modelos"
+
+    def __str__(self):
+        return f"{self.tipo} {self.version}"
+
+
+class NotaEliminada(models.Model):
+    """
+    Registro (tombstone) de una Nota borrada, para que /api/notas/changes/ informe bajas.
+    Ids planos: la sección o el estudiante pueden haberse borrado también.
+    """
+    nota_id = models.BigIntegerField()
+    estudiante_id = models.BigIntegerField()
+    seccion_id = models.BigIntegerField()
+    eliminado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Nota eliminada"
+        verbose_name_plural = "Notas eliminadas"
+
+    def __str__(self):
+        return f"Nota {self.nota_id} eliminada {self.eliminado:%Y-%m-%d %H:%M}"
+
+
+class Trabajo(models.Model):
+    """
+    Trabajo en segundo plano (exportación o ML) de la cola local en BD; lo ejecuta
+    `manage.py procesar_trabajos`. `clave` identifica usuario + tipo + parámetros: solo
+    puede haber un trabajo pendiente o en curso por clave (deduplicación).
+    """
+    PENDIENTE, EN_CURSO, OK, ERROR = "pendiente", "en_curso", "ok", "error"
+    ESTADOS = [(PENDIENTE, "Pendiente"), (EN_CURSO, "En curso"), (OK, "Terminado"), (ERROR, "Error")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="trabajos")
+    tipo = models.CharField(max_length=20)
+    parametros = models.JSONField(default=dict)
+    clave = models.CharField(max_length=64)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+    expira = models.DateTimeField(null=True, blank=True)  # se borra (con su archivo) después de esta fecha
+    worker = models.CharField(max_length=100, blank=True)
+
+    # resultado: la respuesta de la acción, con el cuerpo en JOBS_DIR/<archivo>
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    nombre_archivo = models.CharField(max_length=200, blank=True)
+    archivo = models.CharField(max_length=100, blank=True)
+    tamano = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-creado"]
+        verbose_name = "Trabajo"
+        verbose_name_plural = "Trabajos"
+        indexes = [
+            # el worker toma el pendiente más viejo
+            models.Index(fields=["estado", "creado"], name="trabajo_estado_creado_idx"),
+            models.Index(fields=["usuario", "-creado"], name="trabajo_usuario_creado_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["clave"], condition=models.Q(estado__in=["pendiente", "en_curso"]),
+                name="trabajo_activo_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.id} ({self.estado})"
@@ -0,0 +1,32 @@
+# core/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Paginación por cursor: sin COUNT(*) ni OFFSET, costo constante en páginas profundas."""
+    ordering = ("-id",)
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class NotaCursorPagination(IdCursorPagination):
+    ordering = ("-actualizado", "-id")
+
+
+class SelectablePaginationMixin:
+    """
+    ?paginacion=cursor (y los links next/previous, que traen ?cursor=) usan
+    `cursor_pagination_class`; sin el parámetro se mantiene la paginación global por página.
+    """
+    cursor_pagination_class = IdCursorPagination
+
+    def _wants_cursor(self):
+        params = self.request.query_params if self.request is not None else {}
+        return params.get("paginacion") == "cursor" or "cursor" in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            cls = self.cursor_pagination_class if self._wants_cursor() else self.pagination_class
+            self._paginator = cls() if cls is not None else None
+        return self._paginator
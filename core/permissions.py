@@ -1,6 +1,45 @@
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-def is_in_group(user, name): return user.is_authenticated and user.groups.filter(name=name).exists()
+_ROLES_CACHE_KEY = "gradebase:roles:{}"
+
+
+def get_roles(user):
+    """
+    Nombres de grupo del usuario: una sola consulta por request (se guardan en el
+    objeto request.user) y, si ROLES_CACHE_SECONDS > 0, también en el cache entre requests.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, "_roles_cache", None)
+    if roles is None:
+        timeout = getattr(settings, "ROLES_CACHE_SECONDS", 0)
+        key = _ROLES_CACHE_KEY.format(user.pk)
+        roles = cache.get(key) if timeout else None
+        if roles is None:
+            roles = frozenset(user.groups.values_list("name", flat=True))
+            if timeout:
+                cache.set(key, roles, timeout)
+        user._roles_cache = roles
+    return roles
+
+
+def invalidate_roles(user_ids):
+    cache.delete_many([_ROLES_CACHE_KEY.format(pk) for pk in user_ids])
+
+
+def is_in_group(user, name): return name in get_roles(user)
+
+
+def get_estudiante_id(user):
+    """Id del Estudiante vinculado (claim del JWT o una consulta por request); None si no hay."""
+    if not user.is_authenticated:
+        return None
+    if not hasattr(user, "_estudiante_id"):
+        from .models import Estudiante
+        user._estudiante_id = Estudiante.objects.filter(user=user).values_list("id", flat=True).first()
+    return user._estudiante_id
 
 class IsStudentReadOwnNotas(BasePermission):
     """Estudiante: solo lectura de sus propias Notas."""
@@ -9,7 +48,7 @@ class IsStudentReadOwnNotas(BasePermission):
     def has_object_permission(self, request, view, obj):
         if is_in_group(request.user, "ESTUDIANTE"):
             if request.method in SAFE_METHODS:
-                return getattr(obj.estudiante, "user_id", None) == request.user.id
+                return obj.estudiante_id == get_estudiante_id(request.user)
             return False
         return True  # otros roles se evalúan en otra perm
 
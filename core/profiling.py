@@ -0,0 +1,151 @@
+# core/profiling.py
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("gradebase.profiling")
+
+_PROFILE: ContextVar[Optional["RequestProfile"]] = ContextVar("gradebase_profile", default=None)
+
+
+class RequestProfile:
+    """Tiempos y consultas SQL de un request muestreado."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.db_ms = 0.0
+        self.consultas = Counter()  # (sql, params) -> veces: duplicadas exactas
+        self.plantillas = Counter()  # sql sin params -> veces: patrón N+1
+        self.segmentos = Counter()  # "ser" / "render" -> ms
+        self.vista = None
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - t0) * 1000
+            self.plantillas[sql] += 1
+            try:
+                self.consultas[(sql, repr(params))] += 1
+            except Exception:  # params no representables: solo cuenta la plantilla
+                pass
+
+    def timed(self, segmento, fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.segmentos[segmento] += (time.perf_counter() - t0) * 1000
+        return wrapper
+
+    def resumen(self):
+        n = sum(self.plantillas.values())
+        repetida, veces = self.plantillas.most_common(1)[0] if self.plantillas else ("", 0)
+        return {
+            "total_ms": round((time.perf_counter() - self.inicio) * 1000, 2),
+            "db_ms": round(self.db_ms, 2),
+            "queries": n,
+            "duplicadas": sum(v - 1 for v in self.consultas.values() if v > 1),
+            "max_repeticiones": veces,
+            "sql_mas_repetida": repetida[:200] if veces > 1 else None,
+            "ser_ms": round(self.segmentos["ser"], 2),
+            "render_ms": round(self.segmentos["render"], 2),
+        }
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _PROFILE.get()
+
+
+class ProfilingMiddleware:
+    """
+    Perfilado por muestreo (PROFILING_SAMPLE_RATE, 0 = desactivado): en los requests
+    elegidos mide tiempo total, tiempo y cantidad de SQL, consultas duplicadas y tiempo de
+    serialización / render (vía ProfiledViewMixin). Lo expone en la cabecera Server-Timing
+    y en una línea JSON del logger "gradebase.profiling". En respuestas streaming el
+    total no incluye la generación del cuerpo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rate = float(getattr(settings, "PROFILING_SAMPLE_RATE", 0.0))
+        if self.rate <= 0:
+            raise MiddlewareNotUsed  # Django lo saca de la cadena: costo cero
+        self.header = getattr(settings, "PROFILING_SERVER_TIMING", True)
+        self.slow_ms = float(getattr(settings, "PROFILING_SLOW_MS", 500))
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _PROFILE.set(profile)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(profile.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _PROFILE.reset(token)
+
+        r = profile.resumen()
+        if self.header:
+            response["Server-Timing"] = ", ".join([
+                f"total;dur={r['total_ms']}",
+                f'db;dur={r["db_ms"]};desc="{r["queries"]} queries, {r["duplicadas"]} duplicadas"',
+                f"ser;dur={r['ser_ms']}",
+                f"render;dur={r['render_ms']}",
+            ])
+        match = getattr(request, "resolver_match", None)
+        linea = {
+            "method": request.method,
+            "path": request.path,
+            "vista": profile.vista or (match.view_name if match else None),
+            "status": response.status_code,
+            **r,
+        }
+        nivel = logging.WARNING if r["total_ms"] >= self.slow_ms or r["duplicadas"] else logging.INFO
+        logger.log(nivel, json.dumps(linea, ensure_ascii=False))
+        return response
+
+
+class ProfiledViewMixin:
+    """
+    Para los viewsets: nombra la acción y separa el tiempo de serializer y renderer
+    (el de serializer incluye el SQL de querysets que se evalúan al serializar).
+    """
+
+    def initial(self, request, *args, **kwargs):
+        profile = current_profile()
+        if profile is not None:
+            profile.vista = f"{self.__class__.__name__}.{getattr(self, 'action', None) or request.method.lower()}"
+        return super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        profile = current_profile()
+        if profile is not None:
+            # .data llama a self.to_representation: el atributo de instancia lo intercepta
+            serializer.to_representation = profile.timed("ser", serializer.to_representation)
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        profile = current_profile()
+        renderer = getattr(response, "accepted_renderer", None)
+        if profile is not None and renderer is not None:
+            renderer.render = profile.timed("render", renderer.render)
+        return response
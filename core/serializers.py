@@ -1,22 +1,135 @@
+from typing import Optional
+
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Estudiante, Curso, Seccion, Nota
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .models import Estudiante, Curso, Seccion, Nota, Trabajo, nota_validators
+from .authentication import RolesRefreshToken
+from .trabajos import TIPOS
+from . import metrics
+
+class SparseFieldsetMixin:
+    """Con context["fields"] (lo arma SparseFieldsMixin de la vista) solo se serializan esos campos."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = self.context.get("fields")
+        if keep is not None:
+            for name in set(self.fields) - set(keep):
+                self.fields.pop(name)
 
-class EstudianteSerializer(serializers.ModelSerializer):
+
+class EstudianteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Estudiante
         fields = '__all__'
 
-class CursoSerializer(serializers.ModelSerializer):
+class CursoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Curso
         fields = '__all__'
 
-class SeccionSerializer(serializers.ModelSerializer):
+class SeccionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Seccion
         fields = '__all__'
 
-class NotaSerializer(serializers.ModelSerializer):
+# Relaciones de Nota que se pueden expandir en lectura (?expand=estudiante,seccion)
+NOTA_EXPANSIONS = ("estudiante", "seccion")
+
+
+class NotaEstudianteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Estudiante
+        fields = ("id", "codigo", "nombre", "apellido")
+
+
+class NotaSeccionSerializer(serializers.ModelSerializer):
+    curso_codigo = serializers.CharField(source="curso.codigo", read_only=True)
+    curso_nombre = serializers.CharField(source="curso.nombre", read_only=True)
+    profesor = serializers.CharField(source="profesor.username", read_only=True, default=None)
+    profesor_nombre = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Seccion
+        fields = ("id", "nombre", "curso", "curso_codigo", "curso_nombre", "profesor", "profesor_nombre")
+
+    def get_profesor_nombre(self, obj):
+        return obj.profesor.get_full_name() if obj.profesor else None
+
+
+class NotaSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Con context["expand"] (solo lectura) estudiante / seccion salen como objetos en vez
+    de ids; la vista hace el select_related correspondiente, así que no suma consultas.
+    """
+    _expanders = {"estudiante": NotaEstudianteSerializer, "seccion": NotaSeccionSerializer}
+
     class Meta:
         model = Nota
         fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get("expand", ()):
+            if name in self.fields:
+                self.fields[name] = self._expanders[name](read_only=True)
+
+class NotaBulkItemSerializer(serializers.Serializer):
+    """Fila de /api/notas/bulk/: ids planos (sin consultas por fila) y solo las notas enviadas."""
+    estudiante = serializers.IntegerField()
+    seccion = serializers.IntegerField()
+    avance1 = serializers.FloatField(required=False, allow_null=True, validators=nota_validators)
+    avance2 = serializers.FloatField(required=False, allow_null=True, validators=nota_validators)
+    avance3 = serializers.FloatField(required=False, allow_null=True, validators=nota_validators)
+    participacion = serializers.FloatField(required=False, allow_null=True, validators=nota_validators)
+    proyecto_final = serializers.FloatField(required=False, allow_null=True, validators=nota_validators)
+    nota_final = serializers.FloatField(required=False, allow_null=True, validators=nota_validators)
+
+
+
+class TrabajoSerializer(serializers.ModelSerializer):
+    """Alta (tipo + parametros) y estado de un trabajo en segundo plano; 'resultado' es la URL de descarga."""
+    url = serializers.HyperlinkedIdentityField(view_name="trabajo-detail")
+    tipo = serializers.ChoiceField(choices=list(TIPOS))
+    parametros = serializers.DictField(required=False, default=dict)
+    resultado = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Trabajo
+        fields = ("id", "url", "tipo", "parametros", "estado", "creado", "iniciado", "terminado", "expira",
+                  "status_code", "nombre_archivo", "tamano", "error", "resultado")
+        read_only_fields = ("estado", "creado", "iniciado", "terminado", "expira",
+                            "status_code", "nombre_archivo", "tamano", "error")
+
+    def get_resultado(self, obj) -> Optional[str]:
+        if obj.estado != Trabajo.OK:
+            return None
+        request = self.context.get("request")
+        url = reverse("trabajo-resultado", args=[obj.pk])
+        return request.build_absolute_uri(url) if request else url
+
+class MeasuredTokenMixin:
+    """Cuenta y cronometra la emisión de tokens (métrica gradebase_jwt_*)."""
+    token_tipo = ""
+
+    def validate(self, attrs):
+        with metrics.JWT_DURATION.time(tipo=self.token_tipo):
+            try:
+                data = super().validate(attrs)
+            except Exception:
+                metrics.JWT_TOKENS.inc(tipo=self.token_tipo, resultado="error")
+                raise
+        metrics.JWT_TOKENS.inc(tipo=self.token_tipo, resultado="ok")
+        return data
+
+
+class RolesTokenObtainPairSerializer(MeasuredTokenMixin, TokenObtainPairSerializer):
+    """El access token lleva roles, is_staff y estudiante_id como claims (ver RolesRefreshToken)."""
+    token_tipo = "obtain"
+    token_class = RolesRefreshToken
+
+
+class MeasuredTokenRefreshSerializer(MeasuredTokenMixin, TokenRefreshSerializer):
+    """Cada refresh vuelve a leer los roles de la BD: quitar un grupo aplica al próximo access token."""
+    token_tipo = "refresh"
+    token_class = RolesRefreshToken
@@ -0,0 +1,78 @@
+# core/signals.py
+from django.contrib.auth.models import User, Group
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Nota, NotaEliminada
+from .permissions import invalidate_roles
+from . import ml
+
+_ML_COLUMNS = [*ml.FEATURES, "nota_final"]
+
+
+def notas_cambiadas(seccion_ids):
+    """
+    Invalida lo derivado de las notas de estas secciones. Lo llaman las señales y
+    también las escrituras masivas (bulk_create / update) que no disparan señales.
+    """
+    ml.invalidate_predictions(seccion_ids)
+
+
+def _ml_row(nota):
+    return tuple(getattr(nota, f) for f in _ML_COLUMNS)
+
+
+@receiver(pre_save, sender=Nota)
+def _nota_pre_save(sender, instance, **kwargs):
+    # valores previos en BD para restar su aporte a los estadísticos de regresión
+    if ml.incremental_linear_enabled() and instance.pk:
+        instance._ml_prev_row = (
+            Nota.objects.filter(pk=instance.pk).values_list(*_ML_COLUMNS).first()
+        )
+
+
+@receiver(post_save, sender=Nota)
+def _nota_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    notas_cambiadas([instance.seccion_id])
+    if ml.incremental_linear_enabled():
+        ml.apply_regression_delta([getattr(instance, "_ml_prev_row", None)], [_ml_row(instance)])
+
+
+@receiver(post_delete, sender=Nota)
+def _nota_post_delete(sender, instance, **kwargs):
+    NotaEliminada.objects.create(
+        nota_id=instance.pk, estudiante_id=instance.estudiante_id, seccion_id=instance.seccion_id
+    )
+    notas_cambiadas([instance.seccion_id])
+    if ml.incremental_linear_enabled():
+        ml.apply_regression_delta([_ml_row(instance)], [])
+
+
+# --- cache de roles (permissions.get_roles) ---
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:  # user.groups.add/remove/clear
+        invalidate_roles([instance.pk])
+    elif pk_set:  # group.user_set.add/remove
+        invalidate_roles(pk_set)
+    else:  # group.user_set.clear(): se invalidan los miembros capturados en pre_clear
+        invalidate_roles(getattr(instance, "_roles_members", ()))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _group_pre_clear(sender, instance, action, reverse, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._roles_members = list(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def _group_changed(sender, instance, **kwargs):
+    # renombrar o borrar un grupo cambia los roles de todos sus miembros
+    if instance.pk:
+        invalidate_roles(instance.user_set.values_list("pk", flat=True))
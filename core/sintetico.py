@@ -0,0 +1,152 @@
+# core/sintetico.py
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, Group
+from django.db import transaction
+
+from .models import Curso, Seccion, Estudiante, Nota, NOTA_MIN, NOTA_MAX
+from .bulk import NOTA_FIELDS
+from .signals import notas_cambiadas
+from . import ml
+
+INSERT_BATCH = 5000  # filas por INSERT
+CHUNK_ESTUDIANTES = 10000  # estudiantes (con sus notas) por transacción
+
+_NOMBRES = ["Ana", "Luis", "María", "José", "Carmen", "Jorge", "Lucía", "Carlos", "Rosa", "Miguel",
+            "Sofía", "Diego", "Valeria", "Andrés", "Camila", "Pedro", "Daniela", "Raúl", "Elena", "Hugo"]
+_APELLIDOS = ["García", "Rodríguez", "Quispe", "Flores", "Sánchez", "Ramírez", "Torres", "Mamani",
+              "Vargas", "Castillo", "Rojas", "Mendoza", "Chávez", "Huamán", "Díaz", "Gutiérrez"]
+
+
+def _notas(rng, n: int, media: float, desviacion: float, ruido: float, pendientes: float) -> np.ndarray:
+    """
+    Matriz (n, 6) avance1..proyecto_final + nota_final: cada matrícula tiene un nivel
+    ~ N(media, desviacion), los componentes son nivel + ruido y la final su promedio más
+    ruido. Una fracción `pendientes` queda en curso (avance3, proyecto y final en NaN).
+    """
+    nivel = rng.normal(media, desviacion, size=(n, 1))
+    comps = np.clip(nivel + rng.normal(0.0, ruido, size=(n, 5)), NOTA_MIN, NOTA_MAX)
+    final = np.clip(comps.mean(axis=1) + rng.normal(0.0, ruido / 2, size=n), NOTA_MIN, NOTA_MAX)
+    out = np.round(np.column_stack([comps, final]), 1)
+    en_curso = rng.random(n) < pendientes
+    out[np.ix_(en_curso, [2, 4, 5])] = np.nan
+    return out
+
+
+def generar_datos(
+    *,
+    cursos: int = 10,
+    secciones_por_curso: int = 3,
+    docentes: int = 10,
+    estudiantes: int = 1000,
+    notas_por_estudiante: int = 3,
+    media: float = 13.0,
+    desviacion: float = 3.0,
+    ruido: float = 1.5,
+    pendientes: float = 0.2,
+    seed: int = 42,
+    prefijo: str = "SYN",
+    password: str = "sintetico",
+    con_usuarios: bool = True,
+    progreso: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Genera cursos, secciones, docentes, estudiantes (con usuario opcional) y notas con
+    bulk_create por lotes y un solo hash de contraseña para todos los usuarios.
+    Es reproducible con `seed`; códigos, usernames y emails llevan `prefijo`, que no
+    debe estar en uso. Como bulk_create no dispara señales, al final se invalida lo derivado
+    de las notas (y se reconstruyen los estadísticos de la regresión incremental).
+    """
+    n_secciones = cursos * secciones_por_curso
+    if min(cursos, secciones_por_curso, docentes, estudiantes) < 1:
+        raise ValueError("cursos, secciones, docentes y estudiantes deben ser >= 1.")
+    if not 0 <= notas_por_estudiante <= n_secciones:
+        raise ValueError(f"notas_por_estudiante debe estar entre 0 y {n_secciones} (total de secciones).")
+    low = prefijo.lower()
+    if (Curso.objects.filter(codigo__startswith=f"{prefijo}-").exists()
+            or Estudiante.objects.filter(codigo__startswith=f"{prefijo}-").exists()
+            or User.objects.filter(username__startswith=f"{low}_").exists()):
+        raise ValueError(f"Ya existen datos con el prefijo '{prefijo}'; use otro.")
+
+    log = progreso or (lambda msg: None)
+    rng = np.random.default_rng(seed)
+    pwd_hash = make_password(password)  # un solo hash (el hasher es lento a propósito)
+    g_doc, _ = Group.objects.get_or_create(name="DOCENTE")
+    g_est, _ = Group.objects.get_or_create(name="ESTUDIANTE")
+    membership = User.groups.through
+    t0 = time.perf_counter()
+
+    with transaction.atomic():
+        profes = User.objects.bulk_create(
+            [User(username=f"{low}_doc{i}", email=f"{low}_doc{i}@sintetico.local", password=pwd_hash,
+                  first_name=_NOMBRES[i % len(_NOMBRES)], last_name=_APELLIDOS[i % len(_APELLIDOS)])
+             for i in range(docentes)],
+            batch_size=INSERT_BATCH,
+        )
+        membership.objects.bulk_create([membership(user_id=u.pk, group_id=g_doc.pk) for u in profes],
+                                       batch_size=INSERT_BATCH)
+        cursos_obj = Curso.objects.bulk_create(
+            [Curso(codigo=f"{prefijo}-C{i:04d}", nombre=f"Curso sintético {i}") for i in range(cursos)],
+            batch_size=INSERT_BATCH,
+        )
+        profesor_idx = rng.integers(0, docentes, size=n_secciones)
+        secciones = Seccion.objects.bulk_create(
+            [Seccion(curso_id=c.pk, nombre=f"S{j + 1}", profesor_id=profes[profesor_idx[k]].pk)
+             for k, (c, j) in enumerate((c, j) for c in cursos_obj for j in range(secciones_por_curso))],
+            batch_size=INSERT_BATCH,
+        )
+    seccion_ids = np.array([s.pk for s in secciones])
+    log(f"{cursos} cursos, {n_secciones} secciones y {docentes} docentes.")
+
+    # matrícula: k secciones distintas por estudiante, en paso fijo desde un inicio aleatorio
+    paso = max(1, n_secciones // max(1, notas_por_estudiante))
+    n_notas = 0
+    for inicio in range(0, estudiantes, CHUNK_ESTUDIANTES):
+        n = min(CHUNK_ESTUDIANTES, estudiantes - inicio)
+        idx = range(inicio, inicio + n)
+        nombres = rng.integers(0, len(_NOMBRES), size=n)
+        apellidos = rng.integers(0, len(_APELLIDOS), size=(n, 2))
+        base = rng.integers(0, n_secciones, size=n)
+        matricula = seccion_ids[(base[:, None] + np.arange(notas_por_estudiante) * paso) % n_secciones]
+        notas = _notas(rng, n * notas_por_estudiante, media, desviacion, ruido, pendientes).tolist()
+
+        with transaction.atomic():
+            users = [None] * n
+            if con_usuarios:
+                users = User.objects.bulk_create(
+                    [User(username=f"{low}_est{i}", email=f"{low}_est{i}@sintetico.local", password=pwd_hash)
+                     for i in idx],
+                    batch_size=INSERT_BATCH,
+                )
+                membership.objects.bulk_create([membership(user_id=u.pk, group_id=g_est.pk) for u in users],
+                                               batch_size=INSERT_BATCH)
+            alumnos = Estudiante.objects.bulk_create(
+                [Estudiante(
+                    user_id=u.pk if u else None, codigo=f"{prefijo}-{i:07d}", email=f"{low}_est{i}@sintetico.local",
+                    nombre=_NOMBRES[nombres[k]],
+                    apellido=f"{_APELLIDOS[apellidos[k, 0]]} {_APELLIDOS[apellidos[k, 1]]}",
+                ) for k, (i, u) in enumerate(zip(idx, users))],
+                batch_size=INSERT_BATCH,
+            )
+            filas = [
+                Nota(estudiante_id=e.pk, seccion_id=int(s), **dict(zip(
+                    NOTA_FIELDS, (None if v != v else v for v in notas[k * notas_por_estudiante + j])  # NaN -> NULL
+                )))
+                for k, e in enumerate(alumnos) for j, s in enumerate(matricula[k])
+            ]
+            Nota.objects.bulk_create(filas, batch_size=INSERT_BATCH)
+        n_notas += len(filas)
+        log(f"Estudiantes: {inicio + n}/{estudiantes}. Notas: {n_notas}.")
+
+    notas_cambiadas(seccion_ids.tolist())
+    if ml.incremental_linear_enabled():
+        ml.rebuild_regression_stats()
+
+    return {
+        "cursos": cursos, "secciones": n_secciones, "docentes": docentes,
+        "estudiantes": estudiantes, "notas": n_notas,
+        "segundos": round(time.perf_counter() - t0, 2),
+    }
@@ -1,3 +1,759 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, tag
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import async_views, metrics, ml
+from .permissions import get_roles
+from .profiling import ProfilingMiddleware
+from .bulk import NOTA_FIELDS, upsert_notas
+from .exports import EXPORT_HEADERS
+from .estadisticas import seccion_estadisticas
+from .benchmark import run_benchmark, verificar, ESCENARIOS, ROLES
+from .models import EstadisticasRegresion, Estudiante, Nota, NotaEliminada, PrediccionNota, Seccion, Trabajo
+from .serializers import RolesTokenObtainPairSerializer
+from .sintetico import generar_datos
+
+_metrics = {}
+
+
+def setUpModule():
+    # las métricas de los tests van a un directorio temporal, no al METRICS_DIR del checkout
+    _metrics["dir"] = tempfile.TemporaryDirectory()
+    _metrics["override"] = override_settings(METRICS_DIR=_metrics["dir"].name)
+    _metrics["override"].enable()
+
+
+def tearDownModule():
+    metrics.descartar()  # el volcado al salir del proceso ya no tiene nada que escribir
+    _metrics["override"].disable()
+    _metrics["dir"].cleanup()
+
+
+def _bearer(user):
+    return {"Authorization": f"Bearer {RolesTokenObtainPairSerializer.get_token(user).access_token}"}
+
+
+@tag("benchmark")
+class BenchmarkPresupuestosTests(TestCase):
+    """
+    Corre la suite de benchmark con un dataset chico y exige los presupuestos de consultas
+    (DEFAULT_BUDGETS / BENCHMARK_BUDGETS). Para el reporte completo: manage.py benchmark_api.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        with tempfile.TemporaryDirectory() as ml_dir, override_settings(ML_MODEL_DIR=ml_dir):
+            cls.report = run_benchmark(estudiantes=200, notas_por_estudiante=3, repeticiones=1)
+
+    def test_cubre_todos_los_escenarios_y_roles(self):
+        medidos = {(r["rol"], r["escenario"]) for r in self.report["resultados"]}
+        self.assertEqual(medidos, {(rol, e[0]) for rol in ROLES for e in ESCENARIOS})
+
+    def test_respuestas_esperadas(self):
+        for r in self.report["resultados"]:
+            esperado = 403 if r["rol"] == "estudiante" and r["escenario"].startswith("ml_") else 200
+            self.assertEqual(r["status"], esperado, f"{r['rol']}:{r['escenario']}")
+
+    def test_presupuestos(self):
+        self.assertEqual(verificar(self.report["resultados"]), [])
+
+
+class AsyncCancelacionTests(TransactionTestCase):
+    """Un cliente que corta antes de que empiece la respuesta no debe dejar tomado un hilo del pool."""
+
+    def setUp(self):
+        generar_datos(cursos=1, secciones_por_curso=1, docentes=1, estudiantes=2000, notas_por_estudiante=1,
+                      con_usuarios=False, seed=1)
+        self.admin = User.objects.create_user("admin_async", password="x", is_staff=True)
+
+    def test_cancelar_antes_de_responder_libera_el_cupo(self):
+        request = AsyncRequestFactory().get("/api/async/notas/export/csv/", headers=_bearer(self.admin))
+
+        async def cancelar():
+            tarea = asyncio.ensure_future(async_views.export_csv(request))
+            await asyncio.sleep(0)  # el trabajo ya está en el pool
+            tarea.cancel()
+            for _ in range(200):  # _liberar corre en este loop cuando el hilo termina
+                if async_views._en_curso == 0:
+                    break
+                await asyncio.sleep(0.05)
+            return tarea.cancelled(), async_views._en_curso
+
+        # cola de 1 chunk: el CSV (5 chunks) llena la cola y el productor tiene que enterarse del corte
+        with mock.patch.object(async_views, "_STREAM_QUEUE_CHUNKS", 1):
+            cancelada, en_curso = asyncio.run(cancelar())
+        self.assertTrue(cancelada)
+        self.assertEqual(en_curso, 0)
+
+
+class ImportExportRoundTripTests(TestCase):
+    """Lo que sale de export/csv y export/xlsx se vuelve a importar sin errores ni cambios."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # pendientes: notas en curso con avance3 / proyecto / final vacíos (celdas finales vacías en el XLSX)
+        generar_datos(cursos=2, secciones_por_curso=2, docentes=2, estudiantes=150, notas_por_estudiante=2,
+                      pendientes=0.3, con_usuarios=False, seed=7)
+        cls.admin = User.objects.create_user("admin_rt", password="x", is_staff=True)
+
+    def _snapshot(self):
+        return sorted(Nota.objects.values_list("estudiante_id", "seccion_id", *NOTA_FIELDS))
+
+    def test_export_import(self):
+        client = APIClient()
+        antes = self._snapshot()
+        self.assertTrue(any(fila[-1] is None for fila in antes))
+        for formato, params in (("csv", {}), ("xlsx", {}), ("xlsx", {"por_seccion": 1})):
+            with self.subTest(formato=formato, **params):
+                resp = client.get(f"/api/notas/export/{formato}/", params, headers=_bearer(self.admin))
+                self.assertEqual(resp.status_code, 200)
+                archivo = SimpleUploadedFile(f"notas.{formato}", b"".join(resp.streaming_content))
+                resp = client.post("/api/notas/import/", {"archivo": archivo}, format="multipart",
+                                   headers=_bearer(self.admin))
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp.data["n_errores"], 0, resp.data["errores"][:3])
+                self.assertEqual(resp.data["filas"], len(antes))
+                self.assertEqual(resp.data["actualizadas"], len(antes))
+                self.assertEqual(resp.data["creadas"], 0)
+                self.assertEqual(self._snapshot(), antes)
+
+    def test_rechaza_no_finitos(self):
+        nota = Nota.objects.select_related("estudiante", "seccion__curso").first()
+        clave = [nota.estudiante.codigo, "", nota.seccion.curso.codigo, nota.seccion.nombre]
+        filas = [",".join(EXPORT_HEADERS)] + [",".join(clave + [v, "", "", "", "", ""]) for v in ("nan", "inf", "-inf")]
+        antes = self._snapshot()
+        archivo = SimpleUploadedFile("notas.csv", "\n".join(filas).encode())
+        resp = APIClient().post("/api/notas/import/", {"archivo": archivo}, format="multipart",
+                                headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["n_errores"], 3)
+        self.assertTrue(all("Nota inválida" in e["error"] for e in resp.data["errores"]), resp.data["errores"])
+        self.assertEqual(self._snapshot(), antes)
+
+
+@override_settings(ROLES_CACHE_SECONDS=300)
+class RolesCacheTests(TestCase):
+    """Con ROLES_CACHE_SECONDS > 0 cada cambio de grupos invalida el cache de los usuarios afectados."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grupo = Group.objects.create(name="TUTOR")
+        cls.a = User.objects.create_user("roles_a", password="x")
+        cls.b = User.objects.create_user("roles_b", password="x")
+
+    def setUp(self):
+        cache.clear()
+
+    def _roles(self, user):
+        user = User.objects.get(pk=user.pk)  # instancia nueva: sin los roles del request anterior
+        return get_roles(user)
+
+    def test_cache_e_invalidacion(self):
+        self.assertEqual(self._roles(self.a), frozenset())
+        user = User.objects.get(pk=self.a.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles(user), frozenset())  # sale del cache
+
+        self.a.groups.add(self.grupo)
+        self.assertEqual(self._roles(self.a), {"TUTOR"})
+        self.grupo.user_set.add(self.b)
+        self.assertEqual(self._roles(self.b), {"TUTOR"})
+
+        # clear desde el grupo: m2m_changed no trae pk_set, se usan los miembros de pre_clear
+        self.grupo.user_set.clear()
+        self.assertEqual((self._roles(self.a), self._roles(self.b)), (frozenset(), frozenset()))
+
+        self.grupo.user_set.add(self.a, self.b)
+        self.assertEqual(self._roles(self.a), {"TUTOR"})
+        self.grupo.name = "MENTOR"
+        self.grupo.save()
+        self.assertEqual(self._roles(self.b), {"MENTOR"})
+        self.grupo.delete()
+        self.assertEqual((self._roles(self.a), self._roles(self.b)), (frozenset(), frozenset()))
+
+
+class TokenRolesTests(TestCase):
+    """Los roles viajan solo en el access token y cada refresh los vuelve a leer de la BD."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=1, docentes=1, estudiantes=3, notas_por_estudiante=1, seed=23)
+        cls.alumno = Estudiante.objects.select_related("user").first()
+
+    def _refresh(self, refresh):
+        resp = APIClient().post("/api/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        return resp.data["access"]
+
+    def _notas(self, access):
+        resp = APIClient().get("/api/notas/", headers={"Authorization": f"Bearer {access}"})
+        self.assertEqual(resp.status_code, 200)
+        return resp.data["count"]
+
+    def test_login_refresh_y_baja_de_rol(self):
+        resp = APIClient().post("/api/token/", {"username": self.alumno.user.username, "password": "sintetico"},
+                                format="json")
+        self.assertEqual(resp.status_code, 200)
+        access, refresh = AccessToken(resp.data["access"]), RefreshToken(resp.data["refresh"])
+        self.assertEqual((access["roles"], access["estudiante_id"], access["is_staff"]),
+                         (["ESTUDIANTE"], self.alumno.pk, False))
+        self.assertFalse({"roles", "estudiante_id", "is_staff"} & set(refresh.payload))
+        self.assertEqual(self._notas(resp.data["access"]), 1)
+
+        self.assertEqual(AccessToken(self._refresh(refresh))["roles"], ["ESTUDIANTE"])
+        self.alumno.user.groups.clear()
+        nuevo = self._refresh(refresh)
+        self.assertEqual(AccessToken(nuevo)["roles"], [])
+        self.assertEqual(self._notas(nuevo), 0)
+
+    def test_refresh_viejo_con_claims(self):
+        refresh = RefreshToken.for_user(self.alumno.user)
+        refresh["roles"], refresh["is_staff"] = ["ESTUDIANTE", "DOCENTE"], True  # emitido antes del cambio
+        access = AccessToken(self._refresh(refresh))
+        self.assertEqual((access["roles"], access["is_staff"]), (["ESTUDIANTE"], False))
+
+
+class ConditionalGetTests(TestCase):
+    """304 solo cuando la respuesta no pudo cambiar: lo expandido y las exportaciones van siempre completos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=1, docentes=1, estudiantes=10, notas_por_estudiante=1,
+                      con_usuarios=False, seed=19)
+        cls.admin = User.objects.create_user("admin_etag", password="x", is_staff=True)
+
+    def _get(self, url, **headers):
+        return APIClient().get(url, headers={**headers, **_bearer(self.admin)})
+
+    def test_etag_del_listado(self):
+        etag = self._get("/api/notas/")["ETag"]
+        self.assertEqual(self._get("/api/notas/", **{"If-None-Match": etag}).status_code, 304)
+        Nota.objects.order_by("id").first().delete()
+        resp = self._get("/api/notas/", **{"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_baja_con_if_modified_since(self):
+        resp = self._get("/api/notas/")
+        self.assertFalse(resp.has_header("Last-Modified"))  # una baja no lo movería
+        Nota.objects.order_by("id").first().delete()
+        resp = self._get("/api/notas/", **{"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_expand_y_exportaciones_sin_validadores(self):
+        for url in ("/api/notas/?expand=estudiante", f"/api/notas/{Nota.objects.first().pk}/?expand=all",
+                    "/api/notas/export/csv/"):
+            with self.subTest(url=url):
+                resp = self._get(url)
+                self.assertEqual(resp.status_code, 200)
+                self.assertFalse(resp.has_header("ETag"))
+                if resp.streaming:
+                    b"".join(resp.streaming_content)
+        Estudiante.objects.update(nombre="Renombrado")
+        resp = self._get("/api/notas/?expand=estudiante", **{"If-None-Match": "*"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["results"][0]["estudiante"]["nombre"], "Renombrado")
+
+
+class BulkUpsertTests(TestCase):
+    """POST /api/notas/bulk/: upsert con conteos, campos omitidos intactos, permisos, errores por fila y versión."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=2, docentes=2, estudiantes=30, notas_por_estudiante=1,
+                      pendientes=0.0, con_usuarios=False, seed=13)
+        cls.docente, otro = User.objects.filter(groups__name="DOCENTE").order_by("id")
+        cls.propia, cls.ajena = Seccion.objects.order_by("id")
+        Seccion.objects.filter(pk=cls.propia.pk).update(profesor=cls.docente)
+        Seccion.objects.filter(pk=cls.ajena.pk).update(profesor=otro)
+
+    def _bulk(self, filas):
+        return APIClient().post("/api/notas/bulk/", filas, format="json", headers=_bearer(self.docente))
+
+    def test_upsert(self):
+        t0 = timezone.now()
+        Nota.objects.update(actualizado=t0 - timedelta(hours=1))
+        client = APIClient()
+        etag = client.get("/api/notas/", headers=_bearer(self.docente))["ETag"]
+
+        nota = Nota.objects.filter(seccion=self.propia).first()
+        alumno = Estudiante.objects.exclude(notas__seccion=self.propia).first()
+        resp = self._bulk([
+            {"estudiante": nota.estudiante_id, "seccion": self.propia.pk, "nota_final": 19.5},
+            {"estudiante": alumno.pk, "seccion": self.propia.pk, "avance1": 10.0},
+        ])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, {"creadas": 1, "actualizadas": 1, "total": 2})
+
+        editada = Nota.objects.get(pk=nota.pk)
+        self.assertEqual(editada.nota_final, 19.5)
+        for f in NOTA_FIELDS[:-1]:  # lo omitido conserva su valor
+            self.assertEqual(getattr(editada, f), getattr(nota, f), f)
+        nueva = Nota.objects.get(estudiante=alumno, seccion=self.propia)
+        self.assertEqual((nueva.avance1, nueva.avance2, nueva.nota_final), (10.0, None, None))
+
+        # la escritura mueve la versión: el ETag cambia y changes las informa
+        resp = client.get("/api/notas/", headers={"If-None-Match": etag, **_bearer(self.docente)})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(minutes=1)):
+            resp = client.get("/api/notas/changes/", {"since": (t0 - timedelta(minutes=30)).isoformat()},
+                              headers=_bearer(self.docente))
+        self.assertEqual({n["id"] for n in resp.data["cambios"]}, {nota.pk, nueva.pk})
+
+    def test_seccion_de_otro_docente(self):
+        nota = Nota.objects.filter(seccion=self.ajena).first()
+        resp = self._bulk([{"estudiante": nota.estudiante_id, "seccion": self.ajena.pk, "nota_final": 1.0}])
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(Nota.objects.get(pk=nota.pk).nota_final, nota.nota_final)
+
+    def test_errores_por_fila(self):
+        nota = Nota.objects.filter(seccion=self.propia).first()
+        fila = {"estudiante": nota.estudiante_id, "seccion": self.propia.pk, "nota_final": 1.0}
+        antes = sorted(Nota.objects.values_list("id", *NOTA_FIELDS))
+
+        resp = self._bulk([fila, {**fila, "nota_final": 2.0}])
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([(e["fila"], list(e)) for e in resp.data["errores"]], [(1, ["fila", "non_field_errors"])])
+
+        resp = self._bulk([{**fila, "avance2": 25.0}, {**fila, "estudiante": 0}])
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([(e["fila"], list(e)) for e in resp.data["errores"]], [(0, ["fila", "avance2"])])
+
+        resp = self._bulk([fila, {**fila, "estudiante": 0}])
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([(e["fila"], list(e)) for e in resp.data["errores"]], [(1, ["fila", "estudiante"])])
+        self.assertEqual(sorted(Nota.objects.values_list("id", *NOTA_FIELDS)), antes)  # nada se escribió
+
+
+@override_settings(SYNC_SAFETY_SECONDS=10)
+class SyncChangesTests(TestCase):
+    """Contrato de /api/notas/changes/: ningún cambio (ni baja) queda atrás del cursor sin informarse."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=1, docentes=1, estudiantes=20, notas_por_estudiante=1,
+                      con_usuarios=False, seed=3)
+        cls.admin = User.objects.create_user("admin_sync", password="x", is_staff=True)
+
+    def _changes(self, since, since_id, ahora):
+        with mock.patch("django.utils.timezone.now", return_value=ahora):
+            resp = APIClient().get("/api/notas/changes/", {"since": since.isoformat(), "since_id": since_id},
+                                   headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 200)
+        return resp.data
+
+    def test_cambios_y_bajas_en_transacciones_abiertas(self):
+        t0 = timezone.now()
+        Nota.objects.update(actualizado=t0 - timedelta(hours=1))
+        todas = set(Nota.objects.values_list("id", flat=True))
+
+        r = self._changes(t0 - timedelta(hours=2), 0, t0)
+        self.assertEqual({n["id"] for n in r["cambios"]}, todas)
+        self.assertFalse(r["mas"])
+        self.assertEqual((r["since"], r["since_id"]), (t0 - timedelta(seconds=10), 0))
+
+        # fila sellada antes de esa llamada pero confirmada después, y una baja en la misma situación
+        tarde, borrada = sorted(todas)[:2]
+        Nota.objects.filter(pk=tarde).update(actualizado=t0 - timedelta(seconds=2))
+        Nota.objects.filter(pk=borrada).delete()
+        NotaEliminada.objects.filter(nota_id=borrada).update(eliminado=t0 - timedelta(seconds=1))
+
+        # todavía dentro del margen: no se informa, pero el cursor no la deja atrás
+        r = self._changes(r["since"], r["since_id"], t0 + timedelta(seconds=1))
+        self.assertEqual((r["cambios"], r["eliminadas"]), ([], []))
+        self.assertLess(r["since"], t0 - timedelta(seconds=2))
+
+        r = self._changes(r["since"], r["since_id"], t0 + timedelta(seconds=30))
+        self.assertEqual([n["id"] for n in r["cambios"]], [tarde])
+        self.assertEqual(r["eliminadas"], [borrada])
+        self.assertEqual(r["since"], t0 + timedelta(seconds=20))
+
+        r = self._changes(r["since"], r["since_id"], t0 + timedelta(seconds=30))
+        self.assertEqual((r["cambios"], r["eliminadas"]), ([], []))
+
+    def test_fila_justo_en_el_corte_una_sola_vez(self):
+        t0 = timezone.now()
+        Nota.objects.update(actualizado=t0 - timedelta(hours=1))
+        nota = Nota.objects.order_by("id").first()
+        Nota.objects.filter(pk=nota.pk).update(actualizado=t0 - timedelta(seconds=10))  # == corte
+
+        r = self._changes(t0 - timedelta(hours=2), 0, t0)
+        self.assertNotIn(nota.pk, [n["id"] for n in r["cambios"]])
+        self.assertEqual((r["since"], r["since_id"]), (t0 - timedelta(seconds=10), 0))
+        vistas = []
+        for ahora in (t0 + timedelta(seconds=1), t0 + timedelta(seconds=30), t0 + timedelta(seconds=60)):
+            r = self._changes(r["since"], r["since_id"], ahora)
+            vistas += [n["id"] for n in r["cambios"]]
+        self.assertEqual(vistas, [nota.pk])
+
+    def test_since_dentro_del_margen_no_mueve_el_cursor(self):
+        t0 = timezone.now()
+        r = self._changes(t0 - timedelta(seconds=3), 7, t0)
+        self.assertEqual((r["since"], r["since_id"]), (t0 - timedelta(seconds=3), 7))
+
+    @override_settings(SYNC_MAX_ROWS=7)
+    def test_paginado_avanza_por_fila(self):
+        t0 = timezone.now()
+        Nota.objects.update(actualizado=t0 - timedelta(hours=1))  # empate de timestamps: desempata el id
+        since, since_id, vistas = t0 - timedelta(hours=2), 0, []
+        for _ in range(10):
+            r = self._changes(since, since_id, t0)
+            vistas += [n["id"] for n in r["cambios"]]
+            since, since_id = r["since"], r["since_id"]
+            if not r["mas"]:
+                break
+        self.assertEqual(vistas, sorted(Nota.objects.values_list("id", flat=True)))
+
+
+class MLMaterializadoTests(TestCase):
+    """Las respuestas servidas desde PrediccionNota traen las mismas métricas que el cálculo en vivo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=2, docentes=1, estudiantes=60, notas_por_estudiante=2,
+                      con_usuarios=False, seed=5)
+        cls.admin = User.objects.create_user("admin_ml", password="x", is_staff=True)
+        cls.seccion = Seccion.objects.first()
+
+    def setUp(self):
+        ml_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(ml_dir.cleanup)
+        self.enterContext(override_settings(ML_MODEL_DIR=ml_dir.name))
+        self.enterContext(mock.patch.dict(ml._REGISTRY, clear=True))
+
+    def _post(self, url):
+        resp = APIClient().post(url, {"seccion_id": self.seccion.pk}, format="json", headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 200)
+        return resp.data["model"]
+
+    def test_metricas_con_registro_vacio(self):
+        for url, claves in (("/api/notas/ml/proyeccion/", {"r2", "rmse"}), ("/api/notas/ml/riesgo/", {"accuracy"})):
+            with self.subTest(url=url):
+                en_vivo = self._post(url)
+                self.assertNotIn("materializado", en_vivo)
+                ml._REGISTRY.clear()  # worker recién iniciado: no tiene el modelo cargado
+                guardado = self._post(url)
+                self.assertTrue(guardado.pop("materializado"))
+                guardado.pop("calculado_en")
+                self.assertEqual(guardado, en_vivo)
+                self.assertTrue(claves | {"n_train", "version"} <= set(guardado))
+
+
+@override_settings(ML_LINEAR_TRAINING="incremental")
+class RegresionIncrementalTests(TestCase):
+    """Tras altas, ediciones, bajas y upserts los estadísticos dan el mismo ajuste que OLS sobre la tabla."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=2, docentes=1, estudiantes=80, notas_por_estudiante=1,
+                      pendientes=0.3, con_usuarios=False, seed=11)
+
+    def test_deltas_equivalen_a_ols_exacto(self):
+        medianas = EstadisticasRegresion.objects.get().medianas
+        cerradas = Nota.objects.filter(nota_final__isnull=False).order_by("id")
+        pendiente = Nota.objects.filter(nota_final__isnull=True).first()
+
+        # save(): edición (pre_save lee la fila previa) y una pendiente que entra al entrenamiento
+        nota = cerradas[0]
+        nota.avance1, nota.nota_final = 4.0, 6.5
+        nota.save()
+        pendiente.nota_final = 15.0
+        pendiente.save()
+        # alta y baja
+        seccion = Seccion.objects.exclude(pk=nota.seccion_id).first()
+        alumno = Estudiante.objects.exclude(notas__seccion=seccion).first()
+        Nota.objects.create(estudiante=alumno, seccion=seccion, avance1=18.0, participacion=17.0, nota_final=18.5)
+        cerradas[1].delete()
+        # upsert: campo omitido, fila que sale del entrenamiento y fila nueva
+        otra = Estudiante.objects.exclude(notas__seccion=seccion).exclude(pk=alumno.pk).first()
+        upsert_notas([
+            {"estudiante": cerradas[2].estudiante_id, "seccion": cerradas[2].seccion_id, "avance2": 3.0},
+            {"estudiante": cerradas[3].estudiante_id, "seccion": cerradas[3].seccion_id, "nota_final": None},
+            {"estudiante": otra.pk, "seccion": seccion.pk, "avance3": 11.0, "nota_final": 12.0},
+        ])
+
+        stats = EstadisticasRegresion.objects.get()
+        self.assertEqual(stats.medianas, medianas)  # congeladas hasta la próxima reconstrucción
+        X, y = ml._load_columns(ml._fetch_training_qs())
+        Xa = ml._augmented_rows(X, np.array(medianas))
+        beta = np.linalg.lstsq(Xa, y, rcond=None)[0]
+        r2 = 1.0 - ((y - Xa @ beta) ** 2).sum() / ((y - y.mean()) ** 2).sum()
+
+        self.assertEqual(stats.n, len(y))
+        np.testing.assert_allclose(stats.xtx, Xa.T @ Xa, rtol=1e-9)
+        np.testing.assert_allclose(stats.xty, Xa.T @ y, rtol=1e-9)
+        res = ml.train_linear_regression_from_stats(stats)
+        lr = res["model"].named_steps["lr"]
+        np.testing.assert_allclose([lr.intercept_, *lr.coef_], beta, rtol=1e-6, atol=1e-8)
+        self.assertAlmostEqual(res["r2"], r2, places=9)
+        np.testing.assert_allclose(res["model"].predict(X), Xa @ beta, rtol=1e-6, atol=1e-8)
+
+
+@override_settings(ML_REGISTRY_CHECK_SECONDS=0, ML_RETRAIN_MIN_CHANGE=0.1)
+class MLRegistroTests(TestCase):
+    """El registro reentrena solo con ML_RETRAIN_MIN_CHANGE de filas cambiadas y sobrevive a un reinicio."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=2, docentes=1, estudiantes=100, notas_por_estudiante=2,
+                      pendientes=0.0, con_usuarios=False, seed=31)
+
+    def setUp(self):
+        ml_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(ml_dir.cleanup)
+        self.enterContext(override_settings(ML_MODEL_DIR=ml_dir.name))
+        self.enterContext(mock.patch.dict(ml._REGISTRY, clear=True))
+        self.train = self.enterContext(mock.patch.object(ml, "_train_entry", wraps=ml._train_entry))
+
+    def _tocar(self, n):
+        pks = list(Nota.objects.order_by("id").values_list("pk", flat=True)[:n])
+        Nota.objects.filter(pk__in=pks).update(nota_final=10.0, actualizado=timezone.now() + timedelta(seconds=5))
+
+    def test_umbral_y_disco(self):
+        kind = "logistic_regression"
+        version = ml.get_model(kind)["version"]
+        self.assertEqual(self.train.call_count, 1)
+        self.assertTrue(os.path.exists(ml._model_path(kind)))
+
+        self._tocar(10)  # 5% de 200: por debajo del umbral
+        self.assertEqual(ml.get_model(kind)["version"], version)
+        self.assertEqual(self.train.call_count, 1)
+
+        ml._REGISTRY.clear()  # reinicio del worker: se carga del disco, sin entrenar
+        self.assertEqual(ml.get_model(kind)["version"], version)
+        self.assertEqual(self.train.call_count, 1)
+
+        self._tocar(25)
+        nueva = ml.get_model(kind)["version"]
+        self.assertNotEqual(nueva, version)
+        self.assertEqual(self.train.call_count, 2)
+
+        Nota.objects.filter(pk__in=Nota.objects.order_by("-id").values_list("pk", flat=True)[:30]).delete()
+        self.assertNotEqual(ml.get_model(kind)["version"], nueva)  # las bajas cuentan por el Count
+        self.assertEqual(self.train.call_count, 3)
+
+    def test_force(self):
+        ml.get_model("linear_regression")
+        ml.get_model("linear_regression", force_retrain=True)
+        self.assertEqual(self.train.call_count, 2)
+
+
+class ScoringLotesTests(TestCase):
+    """score_secciones en procesos (ProcessPoolExecutor) guarda lo mismo que en un solo proceso."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=2, secciones_por_curso=2, docentes=2, estudiantes=120, notas_por_estudiante=2,
+                      con_usuarios=False, seed=29)
+        cls.secciones = list(Seccion.objects.order_by("id").values_list("id", flat=True))
+
+    def setUp(self):
+        ml_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(ml_dir.cleanup)
+        self.enterContext(override_settings(ML_MODEL_DIR=ml_dir.name))
+        self.enterContext(mock.patch.dict(ml._REGISTRY, clear=True))
+
+    def test_lote_en_procesos_guarda_predicciones(self):
+        self.assertGreater(len(ml._plan_batches(self.secciones, 60)[0]), 1)  # si no, no se usa el pool
+        for kind, campo in (("linear_regression", "pred_nota_final"), ("logistic_regression", "prob_desaprobacion")):
+            with self.subTest(kind=kind):
+                local = ml.score_secciones(kind, self.secciones, workers=1, batch_rows=60, store=False)
+                self.assertFalse(PrediccionNota.objects.exclude(**{f"{campo}__isnull": True}).exists())
+                out = ml.score_secciones(kind, self.secciones, workers=2, batch_rows=60)
+                self.assertEqual(out["n_rows"], Nota.objects.count())
+                esperado = {p["pk"]: p[campo] for preds in local["por_seccion"].values() for p in preds}
+                guardado = dict(PrediccionNota.objects.values_list("nota_id", campo))
+                self.assertEqual(guardado, esperado)
+                self.assertEqual(set(PrediccionNota.objects.values_list(ml._MATERIALIZED[kind][1], flat=True)),
+                                 {out["metrics"]["version"]})
+
+    def test_seccion_id_cero_no_puntua_todo(self):
+        with self.assertRaisesMessage(CommandError, "Sección no encontrada."):
+            call_command("proyectar_notas", seccion_id=0, stdout=io.StringIO())
+        self.assertFalse(PrediccionNota.objects.exists())
+
+
+class EstadisticasCacheTests(TestCase):
+    """La clave del cache lleva la versión de las notas: ningún worker sirve estadísticas viejas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=1, docentes=1, estudiantes=30, notas_por_estudiante=1,
+                      pendientes=0.0, con_usuarios=False, seed=9)
+        cls.seccion = Seccion.objects.get()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_y_version(self):
+        antes = seccion_estadisticas(self.seccion.pk)
+        with self.assertNumQueries(1):  # solo la versión: el resto sale del cache
+            self.assertEqual(seccion_estadisticas(self.seccion.pk), antes)
+
+        # escritura sin señales (como la de otro proceso): no hay nada que borrar del cache
+        nota = Nota.objects.filter(seccion=self.seccion).first()
+        Nota.objects.filter(pk=nota.pk).update(nota_final=20.0, actualizado=timezone.now())
+        despues = seccion_estadisticas(self.seccion.pk)
+        self.assertEqual(despues["campos"]["nota_final"]["maximo"], 20.0)
+
+        Nota.objects.filter(pk=nota.pk).delete()
+        self.assertEqual(seccion_estadisticas(self.seccion.pk)["total_notas"], antes["total_notas"] - 1)
+
+
+class ProfilingTests(TestCase):
+    """Perfilado por muestreo: fuera de la cadena con tasa 0; cabecera Server-Timing y línea JSON si no."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin_prof", password="x", is_staff=True)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_desactivado(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+        with self.assertNoLogs("gradebase.profiling"):
+            resp = APIClient().get("/api/cursos/", headers=_bearer(self.admin))
+        self.assertFalse(resp.has_header("Server-Timing"))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_MS=10_000)
+    def test_cabecera_y_log(self):
+        with self.assertLogs("gradebase.profiling", "INFO") as logs:
+            resp = APIClient().get("/api/cursos/", headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 200)
+        metricas = re.findall(r'(?:^|, )(\w+);dur=', resp["Server-Timing"])  # desc va entre comillas
+        self.assertEqual(metricas, ["total", "db", "ser", "render"])
+
+        self.assertEqual([r.levelname for r in logs.records], ["INFO"])
+        linea = json.loads(logs.records[0].getMessage())
+        self.assertEqual((linea["method"], linea["path"], linea["vista"], linea["status"]),
+                         ("GET", "/api/cursos/", "CursoViewSet.list", 200))
+        self.assertGreaterEqual(linea["queries"], 2)  # usuario del JWT + listado
+        self.assertIn(f'desc="{linea["queries"]} queries, {linea["duplicadas"]} duplicadas"', resp["Server-Timing"])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_MS=0, PROFILING_SERVER_TIMING=False)
+    def test_lento_sin_cabecera(self):
+        with self.assertLogs("gradebase.profiling", "INFO") as logs:
+            resp = APIClient().get("/api/cursos/", headers=_bearer(self.admin))
+        self.assertFalse(resp.has_header("Server-Timing"))
+        self.assertEqual([r.levelname for r in logs.records], ["WARNING"])
+
+
+class MetricsEndpointTests(TestCase):
+    """/api/metrics/ está cerrado por defecto: token del scraper o usuario admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin_metrics", password="x", is_staff=True)
+        cls.docente = User.objects.create_user("docente_metrics", password="x")
+
+    def test_sin_token_solo_admin(self):
+        client = APIClient()
+        self.assertEqual(client.get("/api/metrics/").status_code, 403)
+        self.assertEqual(client.get("/api/metrics/", headers=_bearer(self.docente)).status_code, 403)
+        resp = client.get("/api/metrics/", headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"gradebase_http_requests_total", resp.content)
+
+    def test_volcados_concurrentes(self):
+        metrics.descartar()
+        self.addCleanup(metrics.descartar)
+        errores = []
+
+        def trabajo():
+            try:
+                for _ in range(200):
+                    metrics.JOBS.inc(tipo="concurrente", estado="ok")
+                    metrics._STORE.flush()
+            except Exception as e:  # p. ej. os.replace de un .tmp que otro hilo ya movió
+                errores.append(e)
+
+        hilos = [threading.Thread(target=trabajo) for _ in range(8)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        self.assertEqual(errores, [])
+        counters, _ = metrics._STORE.snapshot()
+        self.assertEqual(counters[("gradebase_jobs_total", ("concurrente", "ok"))], 1600)
+
+    @override_settings(METRICS_TOKEN="s3creto")
+    def test_con_token(self):
+        client = APIClient()
+        self.assertEqual(client.get("/api/metrics/", headers={"Authorization": "Bearer otro"}).status_code, 403)
+        self.assertEqual(client.get("/api/metrics/", headers={"Authorization": "Bearer s3creto"}).status_code, 200)
+        self.assertEqual(client.get("/api/metrics/", headers=_bearer(self.admin)).status_code, 200)
+
+
+class TrabajosTests(TestCase):
+    """Cola de /api/trabajos/: deduplicación, worker, trabajos de otro usuario y resultados vencidos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(cursos=1, secciones_por_curso=1, docentes=1, estudiantes=20, notas_por_estudiante=1,
+                      con_usuarios=False, seed=17)
+        cls.admin = User.objects.create_user("admin_jobs", password="x", is_staff=True)
+        cls.otro = User.objects.create_user("otro_jobs", password="x", is_staff=True)
+        cls.curso = Seccion.objects.get().curso.codigo
+
+    def setUp(self):
+        jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(jobs_dir.cleanup)
+        self.enterContext(override_settings(JOBS_DIR=jobs_dir.name))
+
+    def _get(self, url, user):
+        resp = APIClient().get(url, headers=_bearer(user))
+        if resp.streaming:
+            self.addCleanup(resp.close)
+        return resp
+
+    def test_encolar_procesar_y_vencer(self):
+        client = APIClient()
+        pedido = {"tipo": "export_csv", "parametros": {"curso": self.curso}}
+        resp = client.post("/api/trabajos/", pedido, format="json", headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 202)
+        pk = resp.data["id"]
+
+        # idéntico (salvo el formato) mientras está pendiente: el mismo trabajo, con 200
+        resp = client.post("/api/trabajos/", {"tipo": "export_csv", "parametros": {"curso": f" {self.curso} "}},
+                           format="json", headers=_bearer(self.admin))
+        self.assertEqual((resp.status_code, resp.data["id"]), (200, pk))
+        self.assertEqual(self._get(f"/api/trabajos/{pk}/resultado/", self.admin).status_code, 202)
+
+        with mock.patch("signal.signal"):  # que el worker no se quede con el Ctrl+C del test runner
+            call_command("procesar_trabajos", una_vez=True, stdout=io.StringIO())
+        resp = self._get(f"/api/trabajos/{pk}/", self.admin)
+        self.assertEqual((resp.data["estado"], resp.data["status_code"]), (Trabajo.OK, 200))
+        resp = self._get(f"/api/trabajos/{pk}/resultado/", self.admin)
+        self.assertEqual(resp.status_code, 200)
+        sincrono = self._get(f"/api/notas/export/csv/?curso={self.curso}", self.admin)
+        self.assertEqual(b"".join(resp.streaming_content), b"".join(sincrono.streaming_content))
+
+        for url in (f"/api/trabajos/{pk}/", f"/api/trabajos/{pk}/resultado/"):
+            self.assertEqual(self._get(url, self.otro).status_code, 404)
+
+        Trabajo.objects.filter(pk=pk).update(expira=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self._get(f"/api/trabajos/{pk}/resultado/", self.admin).status_code, 410)
+        # terminado, ya no deduplica: se encola uno nuevo
+        resp = client.post("/api/trabajos/", pedido, format="json", headers=_bearer(self.admin))
+        self.assertEqual(resp.status_code, 202)
+        self.assertNotEqual(resp.data["id"], pk)
@@ -0,0 +1,226 @@
+# core/trabajos.py
+"""
+Cola de trabajos en segundo plano sobre la BD (sin broker): exportaciones y ML.
+
+El request solo encola (encolar) y devuelve el id; `manage.py procesar_trabajos` toma los
+pendientes (tomar) y los ejecuta con la misma acción de NotaViewSet que atiende el endpoint
+síncrono, autenticada como el usuario que lo pidió: permisos y filtros son los mismos. El
+cuerpo de la respuesta queda en JOBS_DIR hasta `expira` (JOBS_RESULT_TTL_HOURS).
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Trabajo
+from . import metrics
+
+logger = logging.getLogger("gradebase.trabajos")
+
+ACTIVOS = (Trabajo.PENDIENTE, Trabajo.EN_CURSO)
+
+# tipo: (método, acción de NotaViewSet, parámetros de query, parámetros de body)
+TIPOS = {
+    "export_csv": ("get", "export_csv", ("curso", "seccion", "codigo", "gzip"), ()),
+    "export_xlsx": ("get", "export_xlsx", ("curso", "seccion", "codigo", "por_seccion"), ()),
+    "export_pdf": ("get", "export_pdf", ("curso", "seccion", "codigo", "engine"), ()),
+    "ml_proyeccion": ("post", "ml_proyeccion", ("fresh",), ("seccion_id", "curso", "seccion")),
+    "ml_riesgo": ("post", "ml_riesgo", ("fresh",), ("seccion_id", "curso", "seccion")),
+}
+
+
+def _dir() -> str:
+    return str(getattr(settings, "JOBS_DIR", settings.BASE_DIR / "job_results"))
+
+
+def ruta_resultado(trabajo: Trabajo) -> Optional[str]:
+    return os.path.join(_dir(), trabajo.archivo) if trabajo.archivo else None
+
+
+def _borrar_archivo(archivo: str):
+    try:
+        os.remove(os.path.join(_dir(), archivo))
+    except FileNotFoundError:
+        pass
+
+
+# =========================
+# ENCOLADO
+# =========================
+def normalizar(tipo: str, parametros: Dict[str, Any]) -> Dict[str, str]:
+    """Parámetros admitidos por el tipo, como texto y sin vacíos (así la clave no depende del formato)."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo inválido. Opciones: {', '.join(TIPOS)}.")
+    _, _, en_query, en_body = TIPOS[tipo]
+    admitidos = en_query + en_body
+    sobrantes = set(parametros).difference(admitidos)
+    if sobrantes:
+        raise ValueError(f"Parámetros no soportados para {tipo}: {', '.join(sorted(sobrantes))}. "
+                         f"Opciones: {', '.join(admitidos)}.")
+    out = {}
+    for k, v in parametros.items():
+        if isinstance(v, (dict, list)):
+            raise ValueError(f"El parámetro '{k}' debe ser un valor simple.")
+        if v is not None and str(v).strip() != "":
+            out[k] = str(v).strip()
+    return dict(sorted(out.items()))
+
+
+def clave(usuario_id: int, tipo: str, parametros: Dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps([usuario_id, tipo, parametros], sort_keys=True).encode()).hexdigest()
+
+
+def encolar(usuario, tipo: str, parametros: Dict[str, Any]) -> Tuple[Trabajo, bool]:
+    """
+    Encola el trabajo y devuelve (trabajo, True); si el mismo usuario ya tiene uno idéntico
+    pendiente o en curso devuelve (ese, False). ValueError si tipo o parámetros son inválidos.
+    """
+    parametros = normalizar(tipo, parametros)
+    k = clave(usuario.pk, tipo, parametros)
+    activo = Trabajo.objects.filter(clave=k, estado__in=ACTIVOS).first()
+    if activo is not None:
+        return activo, False
+    try:
+        with transaction.atomic():
+            return Trabajo.objects.create(usuario=usuario, tipo=tipo, parametros=parametros, clave=k), True
+    except IntegrityError:  # otro request encoló el mismo entre medio (índice único parcial)
+        activo = Trabajo.objects.filter(clave=k, estado__in=ACTIVOS).first()
+        if activo is None:
+            raise
+        return activo, False
+
+
+# =========================
+# WORKER
+# =========================
+def tomar(worker: str) -> Optional[Trabajo]:
+    """
+    Marca en curso el pendiente más viejo y lo devuelve (None si no hay). El UPDATE
+    condicionado al estado hace que, con varios workers, cada trabajo lo tome uno solo.
+    """
+    while True:
+        pk = (Trabajo.objects.filter(estado=Trabajo.PENDIENTE).order_by("creado")
+              .values_list("pk", flat=True).first())
+        if pk is None:
+            return None
+        tomado = Trabajo.objects.filter(pk=pk, estado=Trabajo.PENDIENTE).update(
+            estado=Trabajo.EN_CURSO, iniciado=timezone.now(), worker=worker[:100],
+        )
+        if tomado:
+            return Trabajo.objects.get(pk=pk)
+
+
+def _request(trabajo: Trabajo, metodo: str, accion: str) -> WSGIRequest:
+    """Request equivalente al del endpoint síncrono, con un access token recién emitido para el usuario."""
+    from .serializers import RolesTokenObtainPairSerializer  # serializers importa este módulo
+
+    _, _, en_query, en_body = TIPOS[trabajo.tipo]
+    query = {k: v for k, v in trabajo.parametros.items() if k in en_query}
+    body = json.dumps({k: v for k, v in trabajo.parametros.items() if k in en_body}).encode() if en_body else b""
+    token = RolesTokenObtainPairSerializer.get_token(trabajo.usuario).access_token
+    return WSGIRequest({
+        "REQUEST_METHOD": metodo.upper(),
+        "PATH_INFO": reverse(f"nota-{accion.replace('_', '-')}"),
+        "QUERY_STRING": urlencode(query),
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "CONTENT_LENGTH": str(len(body)),
+        "CONTENT_TYPE": "application/json",
+        "HTTP_AUTHORIZATION": f"Bearer {token}",
+    })
+
+
+def _detalle(contenido: bytes) -> str:
+    texto = contenido[:4000].decode("utf-8", "replace")
+    try:
+        data = json.loads(texto)
+    except ValueError:
+        return texto
+    return str(data.get("detail", data)) if isinstance(data, dict) else texto
+
+
+def ejecutar(trabajo: Trabajo):
+    """Ejecuta la acción, guarda el cuerpo en JOBS_DIR (escritura atómica) y cierra el trabajo."""
+    from .views import NotaViewSet  # views importa este módulo
+
+    metodo, accion, _, _ = TIPOS[trabajo.tipo]
+    t0 = time.perf_counter()
+    try:
+        view = NotaViewSet.as_view({metodo: accion}, basename="nota", detail=False)
+        response = view(_request(trabajo, metodo, accion))
+        if hasattr(response, "render"):
+            response.render()
+        try:
+            os.makedirs(_dir(), exist_ok=True)
+            cd = response.get("Content-Disposition", "")
+            m = re.search(r'filename="([^"]+)"', cd)
+            nombre = m.group(1) if m else f"{trabajo.tipo}.json"
+            archivo = f"{trabajo.pk}{os.path.splitext(nombre)[1]}"
+            tmp = os.path.join(_dir(), f"{archivo}.tmp")
+            with open(tmp, "wb") as f:
+                for chunk in (response.streaming_content if response.streaming else [response.content]):
+                    f.write(chunk)
+            tamano = os.path.getsize(tmp)
+        finally:
+            response.close()
+
+        trabajo.status_code = response.status_code
+        trabajo.content_type = response.get("Content-Type", "")[:100]
+        if response.status_code == 200:
+            os.replace(tmp, os.path.join(_dir(), archivo))
+            trabajo.estado, trabajo.archivo, trabajo.nombre_archivo, trabajo.tamano = Trabajo.OK, archivo, nombre, tamano
+        else:  # 400 / 403 de la acción: se guarda el motivo, no el archivo
+            with open(tmp, "rb") as f:
+                trabajo.estado, trabajo.error = Trabajo.ERROR, _detalle(f.read())
+            os.remove(tmp)
+    except Exception as e:
+        logger.exception("Trabajo %s (%s) falló", trabajo.pk, trabajo.tipo)
+        trabajo.estado, trabajo.status_code, trabajo.error = Trabajo.ERROR, 500, f"Error interno: {e}"
+
+    trabajo.terminado = timezone.now()
+    trabajo.expira = trabajo.terminado + timedelta(hours=getattr(settings, "JOBS_RESULT_TTL_HOURS", 24))
+    trabajo.save(update_fields=[
+        "estado", "status_code", "content_type", "nombre_archivo", "archivo", "tamano", "error", "terminado", "expira",
+    ])
+    metrics.JOBS.inc(tipo=trabajo.tipo, estado=trabajo.estado)
+    metrics.JOB_DURATION.observe(time.perf_counter() - t0, tipo=trabajo.tipo)
+    return trabajo
+
+
+def recuperar_colgados() -> int:
+    """Trabajos en curso por más de JOBS_TIMEOUT_SECONDS (el worker murió): se cierran con error."""
+    limite = timezone.now() - timedelta(seconds=getattr(settings, "JOBS_TIMEOUT_SECONDS", 3600))
+    ahora = timezone.now()
+    return Trabajo.objects.filter(estado=Trabajo.EN_CURSO, iniciado__lt=limite).update(
+        estado=Trabajo.ERROR, status_code=500, error="El trabajo no terminó a tiempo; vuelva a pedirlo.",
+        terminado=ahora, expira=ahora + timedelta(hours=getattr(settings, "JOBS_RESULT_TTL_HOURS", 24)),
+    )
+
+
+def purgar_vencidos() -> int:
+    """Borra los trabajos vencidos con sus archivos, y los .tmp que dejó un worker caído."""
+    vencidos = Trabajo.objects.filter(expira__lt=timezone.now())
+    for archivo in vencidos.exclude(archivo="").values_list("archivo", flat=True):
+        _borrar_archivo(archivo)
+    borrados, _ = vencidos.delete()
+
+    limite = time.time() - getattr(settings, "JOBS_TIMEOUT_SECONDS", 3600)
+    if os.path.isdir(_dir()):
+        for nombre in os.listdir(_dir()):
+            if nombre.endswith(".tmp") and os.path.getmtime(os.path.join(_dir(), nombre)) < limite:
+                _borrar_archivo(nombre)
+    return borrados
@@ -1,35 +1,51 @@
 # core/views.py
-from django.http import HttpResponse
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
 from django.db.models import Q, Avg
 from django.utils import timezone
-import csv
-from openpyxl import Workbook
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
 from django.template.loader import render_to_string
 
-from rest_framework import viewsets, status
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 
-from xhtml2pdf import pisa
-
-from .models import Estudiante, Curso, Seccion, Nota
+from .models import Estudiante, Curso, Seccion, Nota, NotaEliminada, Trabajo
 from .serializers import (
-    EstudianteSerializer, CursoSerializer, SeccionSerializer, NotaSerializer
+    EstudianteSerializer, CursoSerializer, SeccionSerializer, NotaSerializer, NotaBulkItemSerializer,
+    TrabajoSerializer, NOTA_EXPANSIONS,
+)
+from .bulk import upsert_notas, BULK_MAX_ROWS
+from .importers import import_notas
+from .conditional import ConditionalGetMixin
+from .estadisticas import seccion_estadisticas
+from .pagination import SelectablePaginationMixin, NotaCursorPagination
+from .fieldsets import SparseFieldsMixin
+from .profiling import ProfiledViewMixin
+from .metrics import InstrumentedViewMixin, medir_exportacion
+from .exports import (
+    export_rows, peek, csv_chunks, gzip_chunks, xlsx_file, report_rows, pdf_reportlab, pdf_xhtml2pdf, PDF_ENGINES,
 )
+from .trabajos import encolar, ruta_resultado, ACTIVOS
 from .permissions import (
-    IsStudentReadOwnNotas, IsTeacherOfSectionForWrite, is_in_group
+    IsStudentReadOwnNotas, IsTeacherOfSectionForWrite, is_in_group, get_estudiante_id
 )
 
 # ML helpers
-from core.ml import predict_final_for_seccion, predict_risk_for_seccion
+from core.ml import predict_final_for_seccion, predict_risk_for_seccion, materialized_predictions
 
 
 # =========================
 # ESTUDIANTE
 # =========================
-class EstudianteViewSet(viewsets.ModelViewSet):
+class EstudianteViewSet(
+    InstrumentedViewMixin, ProfiledViewMixin, SparseFieldsMixin, SelectablePaginationMixin, viewsets.ModelViewSet,
+):
     queryset = Estudiante.objects.all()
     serializer_class = EstudianteSerializer
     permission_classes = [IsAuthenticated]
@@ -39,7 +55,8 @@ class EstudianteViewSet(viewsets.ModelViewSet):
         if user.is_staff:
             return super().get_queryset()
         if is_in_group(user, "ESTUDIANTE"):
-            return Estudiante.objects.filter(user=user)
+            estudiante_id = get_estudiante_id(user)
+            return Estudiante.objects.filter(pk=estudiante_id) if estudiante_id else Estudiante.objects.none()
         if is_in_group(user, "DOCENTE"):
             secciones_ids = Seccion.objects.filter(profesor=user).values_list("id", flat=True)
             return Estudiante.objects.filter(notas__seccion_id__in=secciones_ids).distinct()
@@ -49,7 +66,9 @@ class EstudianteViewSet(viewsets.ModelViewSet):
 # =========================
 # CURSO
 # =========================
-class CursoViewSet(viewsets.ModelViewSet):
+class CursoViewSet(
+    InstrumentedViewMixin, ProfiledViewMixin, SparseFieldsMixin, SelectablePaginationMixin, viewsets.ModelViewSet,
+):
     queryset = Curso.objects.all()
     serializer_class = CursoSerializer
     permission_classes = [IsAuthenticated]
@@ -58,7 +77,10 @@ class CursoViewSet(viewsets.ModelViewSet):
 # =========================
 # SECCION
 # =========================
-class SeccionViewSet(viewsets.ModelViewSet):
+class SeccionViewSet(
+    InstrumentedViewMixin, ProfiledViewMixin, SparseFieldsMixin, ConditionalGetMixin, SelectablePaginationMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Seccion.objects.all()
     serializer_class = SeccionSerializer
     permission_classes = [IsAuthenticated]
@@ -70,29 +92,81 @@ class SeccionViewSet(viewsets.ModelViewSet):
         if is_in_group(user, "DOCENTE"):
             return Seccion.objects.filter(profesor=user)
         if is_in_group(user, "ESTUDIANTE"):
-            return Seccion.objects.filter(notas__estudiante__user=user).distinct()
+            estudiante_id = get_estudiante_id(user)
+            if not estudiante_id:
+                return Seccion.objects.none()
+            return Seccion.objects.filter(notas__estudiante_id=estudiante_id).distinct()
         return Seccion.objects.none()
 
+    @action(detail=True, methods=['get'], url_path='estadisticas')
+    def estadisticas(self, request, pk=None):
+        """
+        Media, mediana, desviación, mín/máx, tasa de aprobación e histograma 0–20 por
+        componente y nota final. Cacheado hasta que cambien las notas de la sección.
+        """
+        seccion = self.get_object()
+        return Response({
+            "seccion": {"id": seccion.id, "curso": seccion.curso.codigo, "seccion": seccion.nombre},
+            **seccion_estadisticas(seccion.id),
+        })
+
 
 # =========================
 # NOTA
 # =========================
-class NotaViewSet(viewsets.ModelViewSet):
+class NotaViewSet(
+    InstrumentedViewMixin, ProfiledViewMixin, SparseFieldsMixin, ConditionalGetMixin, SelectablePaginationMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Nota.objects.all()
     serializer_class = NotaSerializer
     permission_classes = [IsAuthenticated, IsStudentReadOwnNotas, IsTeacherOfSectionForWrite]
+    cursor_pagination_class = NotaCursorPagination  # ?paginacion=cursor, orden (actualizado, id)
+    sparse_actions = ("list", "retrieve", "changes")  # ?fields= / ?omit=
     # Requiere django-filter + DEFAULT_FILTER_BACKENDS en settings
     filterset_fields = ['seccion__curso__codigo', 'seccion__nombre', 'estudiante__codigo']
 
     def get_queryset(self):
         user = self.request.user
         if user.is_staff:
-            return super().get_queryset()
-        if is_in_group(user, "DOCENTE"):
-            return Nota.objects.filter(seccion__profesor=user)
-        if is_in_group(user, "ESTUDIANTE"):
-            return Nota.objects.filter(estudiante__user=user)
-        return Nota.objects.none()
+            qs = super().get_queryset()
+        elif is_in_group(user, "DOCENTE"):
+            qs = Nota.objects.filter(seccion__profesor=user)
+        elif is_in_group(user, "ESTUDIANTE"):
+            estudiante_id = get_estudiante_id(user)
+            qs = Nota.objects.filter(estudiante_id=estudiante_id) if estudiante_id else Nota.objects.none()
+        else:
+            return Nota.objects.none()
+        expand = self._expand()
+        if "estudiante" in expand:
+            qs = qs.select_related("estudiante")
+        if "seccion" in expand:
+            qs = qs.select_related("seccion__curso", "seccion__profesor")
+        return qs
+
+    # --- ?expand=estudiante,seccion (solo lectura) ---
+    def _expand(self):
+        if self.request.method not in SAFE_METHODS:
+            return ()
+        raw = self.request.query_params.get("expand", "")
+        pedidos = {p.strip() for p in raw.split(",") if p.strip()}
+        if "all" in pedidos:
+            pedidos = set(NOTA_EXPANSIONS)
+        invalidos = pedidos.difference(NOTA_EXPANSIONS)
+        if invalidos:
+            raise ValidationError({"expand": f"Valores no soportados: {', '.join(sorted(invalidos))}. "
+                                             f"Opciones: {', '.join(NOTA_EXPANSIONS)} o all."})
+        keep = self.sparse_fieldset()  # no se expande lo que ?fields= / ?omit= deja afuera
+        return tuple(n for n in NOTA_EXPANSIONS if n in pedidos and (keep is None or n in keep))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["expand"] = self._expand()
+        return context
+
+    def conditional_enabled(self):
+        # lo expandido (nombres, cursos) puede cambiar sin que cambie la nota
+        return not self._expand()
 
     # --- creación / edición con controles adicionales ---
     def perform_create(self, serializer):
@@ -121,54 +195,197 @@ class NotaViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("No puedes editar notas de secciones de otros docentes.")
         serializer.save()
 
+    # =========================
+    # SINCRONIZACIÓN INCREMENTAL
+    # =========================
+    def _eliminadas_visibles(self):
+        user = self.request.user
+        if user.is_staff:
+            return NotaEliminada.objects.all()
+        if is_in_group(user, "DOCENTE"):
+            return NotaEliminada.objects.filter(seccion_id__in=Seccion.objects.filter(profesor=user).values("id"))
+        if is_in_group(user, "ESTUDIANTE"):
+            estudiante_id = get_estudiante_id(user)
+            if estudiante_id:
+                return NotaEliminada.objects.filter(estudiante_id=estudiante_id)
+        return NotaEliminada.objects.none()
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Notas modificadas desde ?since=<ISO 8601> (orden actualizado, id; máx. SYNC_MAX_ROWS)
+        más los ids borrados en ese intervalo. La respuesta trae el 'since' / 'since_id'
+        para la siguiente llamada; con "mas": true hay que pedir de nuevo de inmediato.
+        Solo se informa hasta now - SYNC_SAFETY_SECONDS: `actualizado` se fija al guardar, no
+        al confirmar, y una fila de una transacción todavía abierta (bulk, import por lotes)
+        quedaría atrás del cursor sin haberse visto. El cursor es el par (actualizado, id) ya
+        informado: al reanudar en (corte, 0) las filas de exactamente `corte` van en la siguiente.
+        """
+        # un '+' del offset llega como espacio si el cliente no lo codificó
+        since = parse_datetime((request.query_params.get("since") or "").replace(" ", "+"))
+        try:
+            since_id = int(request.query_params.get("since_id") or 0)
+        except ValueError:
+            since_id = None
+        if since is None or since_id is None:
+            return Response({"detail": "Parámetros inválidos: 'since' (ISO 8601) y 'since_id' (entero)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        hasta = timezone.now()
+        retencion = getattr(settings, "SYNC_TOMBSTONE_DAYS", 30)
+        if since < hasta - timedelta(days=retencion):
+            return Response({"detail": f"'since' es anterior a {retencion} días: vuelva a listar todo.",
+                             "resync": True}, status=status.HTTP_410_GONE)
+
+        corte = hasta - timedelta(seconds=getattr(settings, "SYNC_SAFETY_SECONDS", 10))
+        limite = getattr(settings, "SYNC_MAX_ROWS", 1000)
+        qs = self.filter_queryset(self.get_queryset()).filter(
+            Q(actualizado__gt=since) | Q(actualizado=since, id__gt=since_id), actualizado__lt=corte,
+        ).order_by("actualizado", "id")
+        cambios = list(qs[:limite + 1])
+        mas = len(cambios) > limite
+        cambios = cambios[:limite]
+        eliminadas = list(
+            self._eliminadas_visibles().filter(eliminado__gt=since, eliminado__lte=corte)
+            .values_list("nota_id", flat=True)
+        )
+        if mas:
+            siguiente, siguiente_id = cambios[-1].actualizado, cambios[-1].id
+        elif corte > since:
+            siguiente, siguiente_id = corte, 0
+        else:  # se volvió a pedir dentro del margen: el cursor no se mueve
+            siguiente, siguiente_id = since, since_id
+        return Response({
+            "cambios": self.get_serializer(cambios, many=True).data,
+            "eliminadas": eliminadas,
+            "since": siguiente,
+            "since_id": siguiente_id,
+            "mas": mas,
+        })
+
+    # =========================
+    # CARGA MASIVA
+    # =========================
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Upsert de muchas notas en una transacción: lista de filas (o {"notas": [...]}) con
+        estudiante, seccion y las notas a escribir. Valida todo en una pasada, revisa la
+        propiedad de cada sección una sola vez y escribe con bulk_create sobre (estudiante, seccion).
+        """
+        user = request.user
+        if is_in_group(user, "ESTUDIANTE"):
+            raise PermissionDenied("Los estudiantes no pueden crear notas.")
+
+        rows = request.data.get("notas") if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({"detail": "Se espera una lista de notas."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > BULK_MAX_ROWS:
+            return Response({"detail": f"Máximo {BULK_MAX_ROWS} filas por request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        ser = NotaBulkItemSerializer(data=rows, many=True)
+        if not ser.is_valid():
+            errs = ser.errors  # lista alineada a las filas (o dict {fila: errores} según versión de DRF)
+            return self._bulk_errors({i: e for i, e in (errs.items() if isinstance(errs, dict) else enumerate(errs)) if e})
+        data = ser.validated_data
+
+        # existencia y propiedad: una consulta para estudiantes y una para secciones
+        estudiantes = set(Estudiante.objects.filter(
+            pk__in={r["estudiante"] for r in data}).values_list("id", flat=True))
+        secciones = dict(Seccion.objects.filter(
+            pk__in={r["seccion"] for r in data}).values_list("id", "profesor_id"))
+        errores, vistos = {}, set()
+        for i, r in enumerate(data):
+            key = (r["estudiante"], r["seccion"])
+            if r["estudiante"] not in estudiantes:
+                errores.setdefault(i, {})["estudiante"] = ["Estudiante inválido."]
+            if r["seccion"] not in secciones:
+                errores.setdefault(i, {})["seccion"] = ["Sección inválida."]
+            if key in vistos:
+                errores.setdefault(i, {})["non_field_errors"] = ["Fila duplicada (estudiante, seccion)."]
+            vistos.add(key)
+        if errores:
+            return self._bulk_errors(errores)
+
+        if is_in_group(user, "DOCENTE"):
+            ajenas = sorted(sid for sid, prof in secciones.items() if prof != user.id)
+            if ajenas:
+                raise PermissionDenied(f"No puedes crear notas en secciones de otros docentes: {ajenas}.")
+
+        creadas, actualizadas = upsert_notas(data)
+        return Response({"creadas": creadas, "actualizadas": actualizadas, "total": len(data)})
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_notas(self, request):
+        """
+        Importa un CSV/XLSX (campo 'archivo', layout de export/csv y export/xlsx).
+        ?formato=csv|xlsx (por defecto según la extensión) y ?dry_run=1 para solo validar.
+        """
+        if is_in_group(request.user, "ESTUDIANTE"):
+            raise PermissionDenied("Los estudiantes no pueden crear notas.")
+        archivo = request.FILES.get("archivo")
+        if archivo is None:
+            return Response({"detail": "Falta el archivo ('archivo')."}, status=status.HTTP_400_BAD_REQUEST)
+        formato = request.query_params.get("formato") or archivo.name.rsplit(".", 1)[-1].lower()
+        try:
+            report = import_notas(archivo, formato, user=request.user,
+                                  dry_run=request.query_params.get("dry_run") in ("1", "true"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+    def _bulk_errors(self, errores):
+        return Response({"errores": [{"fila": i, **e} for i, e in sorted(errores.items())]},
+                        status=status.HTTP_400_BAD_REQUEST)
+
     # =========================
     # EXPORTACIONES
     # =========================
     @action(detail=False, methods=['get'], url_path='export/csv')
+    @medir_exportacion("csv")
     def export_csv(self, request):
-        qs = self._filtered_queryset_for_export()
-        if not qs.exists():
+        """
+        CSV en streaming: filas por chunks desde values_list, sin armar el archivo en memoria.
+        ?gzip=1 entrega notas.csv.gz comprimido al vuelo.
+        """
+        rows = peek(export_rows(self._filtered_queryset_for_export()))
+        if rows is None:
             return HttpResponse("No hay datos para exportar con los filtros dados.", status=400)
 
-        resp = HttpResponse(content_type='text/csv')
-        resp['Content-Disposition'] = 'attachment; filename="notas.csv"'
-        w = csv.writer(resp)
-        w.writerow(['Codigo','Estudiante','Curso','Seccion','Av1','Av2','Av3','Participacion','Proyecto','Final'])
-        for n in qs:
-            w.writerow([
-                n.estudiante.codigo,
-                f"{n.estudiante.nombre} {n.estudiante.apellido}",
-                n.seccion.curso.codigo,
-                n.seccion.nombre,
-                n.avance1, n.avance2, n.avance3, n.participacion, n.proyecto_final, n.nota_final
-            ])
+        if request.GET.get('gzip') in ('1', 'true'):
+            resp = StreamingHttpResponse(gzip_chunks(csv_chunks(rows)), content_type='application/gzip')
+            resp['Content-Disposition'] = 'attachment; filename="notas.csv.gz"'
+        else:
+            resp = StreamingHttpResponse(csv_chunks(rows), content_type='text/csv')
+            resp['Content-Disposition'] = 'attachment; filename="notas.csv"'
         return resp
 
     @action(detail=False, methods=['get'], url_path='export/xlsx')
+    @medir_exportacion("xlsx")
     def export_xlsx(self, request):
+        """
+        XLSX con workbook write-only y archivo temporal (memoria constante).
+        ?por_seccion=1 genera una hoja por sección.
+        """
         qs = self._filtered_queryset_for_export()
-        if not qs.exists():
+        por_seccion = request.GET.get('por_seccion') in ('1', 'true')
+        if por_seccion:
+            qs = qs.order_by('seccion__curso__codigo', 'seccion__nombre', 'estudiante__apellido', 'estudiante__nombre')
+        rows = peek(export_rows(qs))
+        if rows is None:
             return HttpResponse("No hay datos para exportar con los filtros dados.", status=400)
 
-        wb = Workbook(); ws = wb.active; ws.title = "Notas"
-        headers = ['Codigo','Estudiante','Curso','Seccion','Av1','Av2','Av3','Participacion','Proyecto','Final']
-        ws.append(headers)
-        for n in qs:
-            ws.append([
-                n.estudiante.codigo,
-                f"{n.estudiante.nombre} {n.estudiante.apellido}",
-                n.seccion.curso.codigo,
-                n.seccion.nombre,
-                n.avance1, n.avance2, n.avance3, n.participacion, n.proyecto_final, n.nota_final
-            ])
-        resp = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return FileResponse(
+            xlsx_file(rows, por_seccion=por_seccion),
+            as_attachment=True, filename="notas.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
-        resp['Content-Disposition'] = 'attachment; filename="notas.xlsx"'
-        wb.save(resp)
-        return resp
 
     @action(detail=False, methods=['get'], url_path='export/pdf')
+    @medir_exportacion("pdf")
     def export_pdf(self, request):
         """
         Exporta un PDF con las notas filtradas por ?curso=, ?seccion=, ?codigo=
@@ -176,7 +393,12 @@ class NotaViewSet(viewsets.ModelViewSet):
           - Admin: todo
           - Docente: solo sus secciones
           - Estudiante: solo sus notas
+        Motor: ?engine=xhtml2pdf|reportlab (por defecto settings.PDF_ENGINE).
         """
+        engine = request.GET.get('engine') or getattr(settings, 'PDF_ENGINE', 'xhtml2pdf')
+        if engine not in PDF_ENGINES:
+            return HttpResponse(f"Motor PDF inválido. Opciones: {', '.join(PDF_ENGINES)}.", status=400)
+
         qs = self._filtered_queryset_for_export().order_by(
             'seccion__curso__codigo', 'seccion__nombre', 'estudiante__apellido', 'estudiante__nombre'
         )
@@ -193,17 +415,27 @@ class NotaViewSet(viewsets.ModelViewSet):
             "promedio_general": qs.aggregate(avg=Avg('nota_final'))['avg'],
         }
 
-        html = render_to_string("reportes/notas_pdf.html", context)
-
         response = HttpResponse(content_type='application/pdf')
         filename = f"reporte_notas_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-        pisa_status = pisa.CreatePDF(src=html, dest=response, encoding='utf-8')
-        if pisa_status.err:
+        if engine == "reportlab":
+            pdf_reportlab(
+                response, report_rows(qs),
+                usuario=context["usuario"], generado_en=context["generado_en"], curso=context["curso"],
+                seccion=context["seccion"], promedio=context["promedio_general"],
+            )
+            return response
+
+        pdf = self._html_to_pdf(render_to_string("reportes/notas_pdf.html", context))
+        if pdf is None:
             return HttpResponse("Error al generar el PDF.", status=500)
+        response.write(pdf)
         return response
 
+    def _html_to_pdf(self, html):
+        return pdf_xhtml2pdf(html)
+
     # =========================
     # MACHINE LEARNING
     # =========================
@@ -231,6 +463,17 @@ class NotaViewSet(viewsets.ModelViewSet):
             return True
         return False
 
+    def _ml_predictions(self, request, kind, seccion, predict):
+        """
+        Responde desde PrediccionNota si la sección está completa y vigente;
+        ?fresh=1 fuerza el cálculo en vivo (que a su vez refresca la tabla).
+        """
+        if request.query_params.get("fresh") not in ("1", "true"):
+            out = materialized_predictions(kind, seccion)
+            if out is not None:
+                return out
+        return predict(seccion)
+
     @action(detail=False, methods=['post'], url_path='ml/proyeccion')
     def ml_proyeccion(self, request):
         try:
@@ -242,7 +485,7 @@ class NotaViewSet(viewsets.ModelViewSet):
             return Response({"detail": "No autorizado para esta sección."}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            out = predict_final_for_seccion(seccion)
+            out = self._ml_predictions(request, "linear_regression", seccion, predict_final_for_seccion)
         except ValueError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -263,7 +506,7 @@ class NotaViewSet(viewsets.ModelViewSet):
             return Response({"detail": "No autorizado para esta sección."}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            out = predict_risk_for_seccion(seccion)
+            out = self._ml_predictions(request, "logistic_regression", seccion, predict_risk_for_seccion)
         except ValueError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -286,3 +529,62 @@ class NotaViewSet(viewsets.ModelViewSet):
         if codigo:
             qs = qs.filter(estudiante__codigo=codigo)
         return qs
+
+
+# =========================
+# TRABAJOS EN SEGUNDO PLANO
+# =========================
+class TrabajoViewSet(
+    InstrumentedViewMixin, ProfiledViewMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet,
+):
+    """
+    Exportaciones y ML por la cola (manage.py procesar_trabajos). POST {"tipo": ..., "parametros": {...}}
+    responde 202 con el id (o 200 con el trabajo idéntico que ya está en curso); GET /{id}/ da el
+    estado y GET /{id}/resultado/ descarga la respuesta. Cada usuario ve solo sus trabajos.
+    """
+    queryset = Trabajo.objects.all()
+    serializer_class = TrabajoSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["estado", "tipo"]
+
+    def get_queryset(self):
+        if not self.request.user.is_authenticated:  # generación del schema
+            return Trabajo.objects.none()
+        return super().get_queryset().filter(usuario=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        ser = self.get_serializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        try:
+            trabajo, creado = encolar(request.user, ser.validated_data["tipo"], ser.validated_data["parametros"])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        data = self.get_serializer(trabajo).data
+        return Response(data, status=status.HTTP_202_ACCEPTED if creado else status.HTTP_200_OK,
+                        headers={"Location": data["url"]})
+
+    def perform_destroy(self, instance):
+        """Cancela un pendiente o borra uno terminado (con su archivo); uno en curso no se toca."""
+        borrados = Trabajo.objects.filter(pk=instance.pk).exclude(estado=Trabajo.EN_CURSO).delete()[0]
+        if not borrados:
+            raise ValidationError({"detail": "El trabajo está en curso; espere a que termine."})
+        path = ruta_resultado(instance)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    @action(detail=True, methods=['get'], url_path='resultado')
+    def resultado(self, request, pk=None):
+        trabajo = self.get_object()
+        if trabajo.estado in ACTIVOS:
+            return Response(self.get_serializer(trabajo).data, status=status.HTTP_202_ACCEPTED,
+                            headers={"Retry-After": "2"})
+        if trabajo.estado == Trabajo.ERROR:
+            return Response({"detail": trabajo.error}, status=trabajo.status_code or 500)
+        path = ruta_resultado(trabajo)
+        if (trabajo.expira and trabajo.expira < timezone.now()) or not os.path.exists(path):
+            return Response({"detail": "El resultado expiró; vuelva a pedir el trabajo."}, status=status.HTTP_410_GONE)
+        return FileResponse(
+            open(path, "rb"), as_attachment=trabajo.content_type != "application/json",
+            filename=trabajo.nombre_archivo, content_type=trabajo.content_type,
+        )